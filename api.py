@@ -0,0 +1,345 @@
+"""
+Headless access to the solver: a JSON HTTP route for the Gradio app and a
+command line tool streaming a JSONL file of requests through the solver.
+
+A request is a JSON object such as
+
+    {
+        "language": "en",
+        "currency": "gold",
+        "budget": 5000,
+        "blooms_rate": 1,
+        "confiserie_rate": 0,
+        "talent_price_bonus": 20,
+        "strategy": "MinimizeStock",
+        "inventory": [{"name": "fanged_geranium", "tier": "radiant", "count": 30}]
+    }
+
+where only "budget" and "inventory" are required. Budgets, counts, rate
+levels and talent bonuses must stay within the limits of the app
+(`MAX_BUDGET`, `MAX_STOCK`, `RATE_LEVELS`, `MAX_TALENT_BONUS`). The result is the
+`solver.structure_results` dict, plus the formatted "text" when "language"
+is given. `"alternatives": k` also lists the k best distinct plans under
+"alternatives", filtered by the optional "min_distance" (units),
+"distinct_items" (a different set of items per plan), "keep_items" (items
+no plan sells) and "sell_items" (items every plan sells), both lists of
+{name, tier} objects. `"daily_budgets":
+[5000, 5000, 8000]` also plans the sales over one day per budget under
+"plan": the totals over all days, with one result per day under "days".
+`"sensitivity": true` adds, under "sensitivity", the total value gained by
+one more unit and lost by one less of each stocked item, and the next
+reachable total value with the extra budget it takes. `"sweep_bonuses":
+[0, 20, 40]` adds, under "sweep", the best total value and item count for
+every blooms rate, confiserie rate and one of these talent bonuses.
+
+Usage:
+    python api.py [requests.jsonl] [-o results.jsonl] [--workers 4]
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+
+from data_loader import (
+    MAX_ALTERNATIVES,
+    MAX_BUDGET,
+    MAX_PLAN_DAYS,
+    MAX_STOCK,
+    MAX_SWEEP_BONUSES,
+    MAX_TALENT_BONUS,
+    RATE_LEVELS,
+    current_catalog,
+)
+from scheduler import IN_FLIGHT
+from solution_cache import SOLUTION_CACHE, solution_key
+from solver import (
+    format_batch_results,
+    get_prices,
+    inventory_to_stocks,
+    item_indices,
+    k_best_solutions,
+    optimize,
+    plan_days,
+    structure_results,
+    sweep,
+)
+
+DEFAULTS = {
+    "language": None,
+    "currency": "gold",
+    "blooms_rate": 0,
+    "confiserie_rate": 0,
+    "talent_price_bonus": 0,
+    "strategy": "MinimizeStock",
+    "alternatives": 0,
+    "min_distance": 1,
+    "distinct_items": False,
+    "keep_items": [],
+    "sell_items": [],
+    "daily_budgets": [],
+    "sensitivity": False,
+    "sweep_bonuses": [],
+}
+
+
+def _integer(value, name, low, high) -> int:
+    """Reads an integer field, raising `ValueError` unless low <= value <= high."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{name} must be an integer") from None
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+
+def parse_request(payload: dict) -> dict:
+    """
+    Validates a request and fills in defaults, raising `TypeError` when a
+    field has the wrong type and `ValueError` when it is otherwise malformed
+    or a number is out of the range the app accepts.
+    """
+    if not isinstance(payload, dict):
+        raise TypeError("A request must be a JSON object")
+    missing = {"budget", "inventory"} - payload.keys()
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(sorted(missing))}")
+    request = {**DEFAULTS, **payload}
+    if request["currency"] not in ("gold", "gems"):
+        raise ValueError(f"Unknown currency: {request['currency']}")
+    if request["strategy"] not in ("MinimizeStock", "MaximizeStock"):
+        raise ValueError(f"Unknown strategy: {request['strategy']}")
+    if not isinstance(request["inventory"], list) or not all(
+        isinstance(item, dict) for item in request["inventory"]
+    ):
+        raise TypeError("inventory must be a list of {name, tier, count} objects")
+    request["budget"] = _integer(request["budget"], "budget", 0, MAX_BUDGET)
+    for field in ("blooms_rate", "confiserie_rate"):
+        request[field] = _integer(request[field], field, 0, RATE_LEVELS[-1])
+    request["talent_price_bonus"] = _integer(
+        request["talent_price_bonus"], "talent_price_bonus", 0, MAX_TALENT_BONUS
+    )
+    request["alternatives"] = _integer(
+        request["alternatives"], "alternatives", 0, MAX_ALTERNATIVES
+    )
+    request["min_distance"] = max(
+        _integer(request["min_distance"], "min_distance", 0, 2**31 - 1), 1
+    )
+    request["distinct_items"] = bool(request["distinct_items"])
+    for field in ("keep_items", "sell_items"):
+        if not isinstance(request[field], list) or not all(
+            isinstance(item, dict) for item in request[field]
+        ):
+            raise TypeError(f"{field} must be a list of {{name, tier}} objects")
+        request[field] = [
+            (item.get("name"), item.get("tier")) for item in request[field]
+        ]
+    request["sensitivity"] = bool(request["sensitivity"])
+    if not isinstance(request["daily_budgets"], list):
+        raise TypeError("daily_budgets must be a list of budgets")
+    if len(request["daily_budgets"]) > MAX_PLAN_DAYS:
+        raise ValueError(f"daily_budgets covers at most {MAX_PLAN_DAYS} days")
+    request["daily_budgets"] = [
+        _integer(budget, "daily_budgets entry", 0, MAX_BUDGET)
+        for budget in request["daily_budgets"]
+    ]
+    if not isinstance(request["sweep_bonuses"], list):
+        raise TypeError("sweep_bonuses must be a list of talent bonuses")
+    if len(request["sweep_bonuses"]) > MAX_SWEEP_BONUSES:
+        raise ValueError(f"sweep_bonuses holds at most {MAX_SWEEP_BONUSES} bonuses")
+    request["sweep_bonuses"] = [
+        _integer(bonus, "sweep_bonuses entry", 0, MAX_TALENT_BONUS)
+        for bonus in request["sweep_bonuses"]
+    ]
+    request["inventory"] = {
+        (item["name"], item["tier"]): _integer(
+            item.get("count") or 0, "count", 0, MAX_STOCK
+        )
+        for item in request["inventory"]
+    }
+    return request
+
+
+def solve_request(payload: dict, optimize_fn=None) -> dict:
+    """
+    Solves one request. Concurrent identical requests share one solve.
+
+    `optimize_fn` replaces `optimize` for cache misses, e.g. to run the
+    solve in a worker process.
+    """
+    request = parse_request(payload)
+    # The whole request runs on the version it started with
+    catalog = current_catalog()
+    prices = get_prices(
+        request["currency"],
+        request["blooms_rate"],
+        request["confiserie_rate"],
+        request["talent_price_bonus"],
+        catalog=catalog,
+    )
+    stocks = inventory_to_stocks(request["inventory"], catalog)
+    budget, strategy = request["budget"], request["strategy"]
+
+    key = solution_key(budget, strategy, stocks, prices)
+    outputs = SOLUTION_CACHE.get(key, version=catalog.version)
+    if request["sensitivity"] and "sensitivity" not in (outputs or {}):
+        outputs = None
+    if outputs is None:
+        # The report, when asked for, is computed and cached with the solve;
+        # only solves computing it can answer requests asking for it
+        outputs = IN_FLIGHT.run(
+            f"{catalog.version}:{key}:{request['sensitivity']}",
+            partial(optimize_fn or optimize, report=request["sensitivity"]),
+            budget,
+            strategy,
+            stocks,
+            prices,
+        )
+        SOLUTION_CACHE.put(key, outputs, version=catalog.version)
+
+    result = structure_results(outputs, prices, budget, strategy, catalog=catalog)
+    if request["language"]:
+        result["text"] = format_batch_results(
+            [result], request["language"], request["currency"], catalog=catalog
+        )[0]
+    if request["alternatives"]:
+        result["alternatives"] = [
+            structure_results(plan, prices, budget, strategy, catalog=catalog)
+            for plan in k_best_solutions(
+                budget,
+                strategy,
+                stocks,
+                prices,
+                k=request["alternatives"],
+                min_distance=request["min_distance"],
+                distinct_items=request["distinct_items"],
+                keep_items=item_indices(request["keep_items"], catalog),
+                sell_items=item_indices(request["sell_items"], catalog),
+            )
+        ]
+    if request["sensitivity"]:
+        report = outputs["sensitivity"]
+        result["sensitivity"] = {
+            "items": [
+                {
+                    "name": catalog.item_keys[i][0],
+                    "tier": catalog.item_keys[i][1],
+                    "gain": report["gain"][i],
+                    "loss": report["loss"][i],
+                }
+                for i in report["items"]
+            ],
+            "next_value": report["next_value"],
+            "budget_slack": report["budget_slack"],
+        }
+    if request["daily_budgets"]:
+        budgets = request["daily_budgets"]
+        plan = plan_days(budgets, strategy, stocks, prices)
+        result["plan"] = structure_results(
+            plan, prices, sum(budgets), strategy, catalog=catalog
+        )
+        result["plan"]["days"] = [
+            {
+                key: value
+                for key, value in structure_results(
+                    day, prices, day_budget, strategy, catalog=catalog
+                ).items()
+                if key not in ("strategy", "optimal", "gap", "bound")
+            }
+            for day, day_budget in zip(plan["days"], budgets)
+        ]
+    if request["sweep_bonuses"]:
+        bonuses = request["sweep_bonuses"]
+        grid = sweep(
+            budget, strategy, stocks, request["currency"], bonuses, catalog=catalog
+        )
+        result["sweep"] = [
+            {
+                "blooms_rate": blooms_rate,
+                "confiserie_rate": confiserie_rate,
+                "talent_price_bonus": bonus,
+                "total_price": int(grid["total_price"][i, j, k]),
+                "total_count": int(grid["total_count"][i, j, k]),
+            }
+            for i, blooms_rate in enumerate(RATE_LEVELS)
+            for j, confiserie_rate in enumerate(RATE_LEVELS)
+            for k, bonus in enumerate(bonuses)
+        ]
+    return result
+
+
+def _solve_line(line: str) -> dict:
+    """Solves one JSONL line, turning bad input into an error record."""
+    try:
+        return solve_request(json.loads(line))
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": str(e)}
+
+
+def mount_api(app, path="/api/solve", optimize_fn=None):
+    """Adds a JSON solve route to the FastAPI app serving the Gradio Blocks."""
+    from fastapi import Body, HTTPException
+
+    # A plain function runs in FastAPI's thread pool, off the event loop
+    def solve(payload: dict = Body(...)):
+        try:
+            return solve_request(payload, optimize_fn=optimize_fn)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    app.add_api_route(path, solve, methods=["POST"])
+
+
+def stream_results(lines, workers=1, window=None):
+    """
+    Yields the result of each JSONL line in input order, solving up to
+    `window` lines ahead across `workers` processes without reading the
+    whole input first.
+    """
+    lines = (line for line in lines if line.strip())
+    if workers <= 1:
+        yield from map(_solve_line, lines)
+        return
+
+    window = window or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for line in lines:
+            pending.append(executor.submit(_solve_line, line))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream a JSONL file of solve requests through the solver."
+    )
+    parser.add_argument("input", nargs="?", default="requests.jsonl")
+    parser.add_argument("-o", "--output", help="Output JSONL file, stdout by default")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        source = (
+            sys.stdin
+            if args.input == "-"
+            else stack.enter_context(open(args.input, encoding="utf-8"))
+        )
+        sink = (
+            stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            if args.output
+            else sys.stdout
+        )
+        for result in stream_results(source, workers=args.workers):
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+            sink.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,64 @@
 import gradio as gr
 
-from solver import get_results
+from api import mount_api
+from data_loader import start_catalog_watcher
+from metrics import METRICS_ENABLED, mount_metrics
+from scheduler import SOLVE_SLOTS
+from solver import (
+    INCREMENTAL_SOLVES,
+    get_alternatives,
+    get_day_plan,
+    get_frontier_plot_data,
+    get_results_incremental,
+    get_sweep_table,
+)
 from ui.display import (
+    DISH_INPUTS,
+    PLANT_INPUTS,
+    get_alternatives_button,
+    get_alternatives_count,
+    get_alternatives_distance,
+    get_alternatives_distinct,
+    get_alternatives_keep,
+    get_alternatives_output,
+    get_alternatives_sell,
     get_blooms_acquisition_rate,
     get_budget,
     get_confiserie_acquisition_rate,
     get_currency,
+    get_days_budgets,
+    get_days_button,
+    get_days_output,
     get_dishes_selector,
+    get_frontier_button,
+    get_frontier_plot,
+    get_inventory_view,
     get_language,
     get_plants_selector,
     get_strategy,
+    get_sweep_bonuses,
+    get_sweep_button,
+    get_sweep_output,
     get_talent_price_bonus,
     prerender_inventory_inputs,
     update_all_ui_components,
+    update_dish_inputs,
     update_dishes_selector_on_language,
-    update_inventory_inputs,
     update_inventory_ui_by_language,
+    update_plant_inputs,
     update_plants_selector_on_language,
     update_selectors_on_currency,
 )
+from worker_pool import (
+    SOLVER_WORKERS,
+    get_results_in_pool,
+    optimize_in_pool,
+    start_pool,
+)
+
+# Solve requests let past the Gradio queue, so that identical ones can be
+# coalesced and cheap ones can overtake expensive ones in the solve scheduler
+SOLVER_CONCURRENCY = 4 * max(SOLVER_WORKERS, SOLVE_SLOTS, 1)
 
 # Hightlight the first tier of item
 css = """
@@ -94,18 +134,40 @@ with gr.Blocks(js=js, css=css, theme=gr.themes.Monochrome()) as demo:
         dishes_selector: gr.CheckboxGroup = get_dishes_selector("en", "gold")
         with gr.Row(key="inventory_inputs"):
             inventory_inputs = prerender_inventory_inputs()
+        # What this session's browser shows of the inventory inputs
+        inventory_view = get_inventory_view()
         strategy: gr.Radio = get_strategy("en")
         blooms_rate: gr.Dropdown = get_blooms_acquisition_rate("en")
         confiserie_rate: gr.Dropdown = get_confiserie_acquisition_rate("en")
         talent_price_bonus: gr.Number = get_talent_price_bonus("en")
         solve_button = gr.Button("Solve")
         results_output = gr.Textbox(label="Results", show_copy_button=True)
+        frontier_button: gr.Button = get_frontier_button("en")
+        frontier_plot: gr.LinePlot = get_frontier_plot("en")
+        with gr.Row():
+            alternatives_count: gr.Number = get_alternatives_count("en")
+            alternatives_distance: gr.Number = get_alternatives_distance("en")
+            alternatives_distinct: gr.Checkbox = get_alternatives_distinct("en")
+        with gr.Row():
+            alternatives_keep: gr.Dropdown = get_alternatives_keep("en")
+            alternatives_sell: gr.Dropdown = get_alternatives_sell("en")
+        alternatives_button: gr.Button = get_alternatives_button("en")
+        alternatives_output: gr.Textbox = get_alternatives_output("en")
+        days_budgets: gr.Textbox = get_days_budgets("en")
+        days_button: gr.Button = get_days_button("en")
+        days_output: gr.Textbox = get_days_output("en")
+        sweep_bonuses: gr.Textbox = get_sweep_bonuses("en")
+        sweep_button: gr.Button = get_sweep_button("en")
+        sweep_table: gr.Dataframe = get_sweep_output("en")
 
+    # Both inventory callbacks send only the inputs that differ from
+    # `inventory_view`, so they share one queue and never update it at once
     gr.on(
         language.change,
         update_inventory_ui_by_language,
-        inputs=[language],
-        outputs=inventory_inputs,
+        inputs=[language, inventory_view],
+        outputs=inventory_inputs + [inventory_view],
+        concurrency_id="inventory_inputs",
     )
 
     gr.on(
@@ -136,6 +198,21 @@ with gr.Blocks(js=js, css=css, theme=gr.themes.Monochrome()) as demo:
             talent_price_bonus,
             results_output,
             solve_button,
+            frontier_button,
+            frontier_plot,
+            alternatives_count,
+            alternatives_distance,
+            alternatives_distinct,
+            alternatives_keep,
+            alternatives_sell,
+            alternatives_button,
+            alternatives_output,
+            days_budgets,
+            days_button,
+            days_output,
+            sweep_bonuses,
+            sweep_button,
+            sweep_table,
         ],
     )
 
@@ -145,15 +222,66 @@ with gr.Blocks(js=js, css=css, theme=gr.themes.Monochrome()) as demo:
         outputs=[plants_selector, dishes_selector],
     )
 
-    gr.on(
-        triggers=[plants_selector.change, dishes_selector.change],
-        fn=update_inventory_inputs,
-        inputs=[plants_selector, dishes_selector, currency],
-        outputs=inventory_inputs,
+    plants_selector.change(
+        fn=update_plant_inputs,
+        inputs=[plants_selector, currency, language, inventory_view],
+        outputs=[inventory_inputs[i] for i in PLANT_INPUTS] + [inventory_view],
+        concurrency_id="inventory_inputs",
+    )
+
+    dishes_selector.change(
+        fn=update_dish_inputs,
+        inputs=[dishes_selector, currency, language, inventory_view],
+        outputs=[inventory_inputs[i] for i in DISH_INPUTS] + [inventory_view],
+        concurrency_id="inventory_inputs",
+    )
+
+    solve_inputs = [
+        language,
+        currency,
+        budget,
+        blooms_rate,
+        confiserie_rate,
+        talent_price_bonus,
+        strategy,
+    ] + inventory_inputs
+
+    if INCREMENTAL_SOLVES:
+        # Opt-in: each browser session keeps its solver state between clicks,
+        # solving in this process rather than in the worker pool
+        solver_session = gr.State(None, time_to_live=3600)
+        solve_button.click(
+            fn=get_results_incremental,
+            inputs=[solver_session] + solve_inputs,
+            outputs=[results_output, solver_session],
+            # Admitted requests wait in the solve scheduler, cheapest first
+            concurrency_limit=SOLVER_CONCURRENCY,
+        )
+    else:
+        solve_button.click(
+            fn=get_results_in_pool,
+            inputs=solve_inputs,
+            outputs=results_output,
+            # At most one running solve per worker process; admitted requests
+            # wait in the solve scheduler, cheapest first
+            concurrency_limit=SOLVER_CONCURRENCY,
+        )
+
+    frontier_button.click(
+        fn=get_frontier_plot_data,
+        inputs=[
+            currency,
+            blooms_rate,
+            confiserie_rate,
+            talent_price_bonus,
+            strategy,
+        ]
+        + inventory_inputs,
+        outputs=frontier_plot,
     )
 
-    solve_button.click(
-        fn=get_results,
+    alternatives_button.click(
+        fn=get_alternatives,
         inputs=[
             language,
             currency,
@@ -162,10 +290,44 @@ with gr.Blocks(js=js, css=css, theme=gr.themes.Monochrome()) as demo:
             confiserie_rate,
             talent_price_bonus,
             strategy,
+            alternatives_count,
+            alternatives_distance,
+            alternatives_distinct,
+            alternatives_keep,
+            alternatives_sell,
+        ]
+        + inventory_inputs,
+        outputs=alternatives_output,
+    )
+
+    days_button.click(
+        fn=get_day_plan,
+        inputs=[
+            language,
+            currency,
+            days_budgets,
+            blooms_rate,
+            confiserie_rate,
+            talent_price_bonus,
+            strategy,
         ]
         + inventory_inputs,
-        outputs=results_output,
+        outputs=days_output,
+    )
+
+    sweep_button.click(
+        fn=get_sweep_table,
+        inputs=[language, currency, budget, strategy, sweep_bonuses] + inventory_inputs,
+        outputs=sweep_table,
     )
 
-demo.queue()
-demo.launch(share=False)
+if __name__ == "__main__":
+    # Workers must start before Gradio spawns its server threads
+    start_pool()
+    start_catalog_watcher()
+    demo.queue()
+    demo.launch(share=False, prevent_thread_lock=True)
+    mount_api(demo.app, optimize_fn=optimize_in_pool)
+    if METRICS_ENABLED:
+        mount_metrics(demo.app)
+    demo.block_thread()
@@ -0,0 +1,125 @@
+"""
+Time `solver.k_best_solutions` on full-catalog inventories at the UI defaults
+and on a few wider searches, and fail when a call runs past its time limit
+or returns plans out of rank order, or when items sharing a price are not
+listed as separate plans.
+
+Run from anywhere:
+    python benchmarks/bench_alternatives.py [--seed 0] [--slack 1.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+from data_loader import current_catalog
+from solver import ALTERNATIVES_TIME_LIMIT, get_prices, k_best_solutions, optimize
+
+# (currency, budget, stocked items or None for all, k, min_distance, distinct_items)
+WORKLOADS = [
+    ("gold", 3000, None, 3, 1, False),
+    ("gold", 50000, None, 3, 1, False),
+    ("gems", 1000, 30, 3, 1, False),
+    ("gold", 20000, None, 10, 5, False),
+    ("gold", 20000, None, 5, 1, True),
+]
+
+# Two rare-color plants selling for 47 gold each, one unit of each, budget 47:
+# selling either one is a plan of its own
+EQUAL_PRICES = [
+    ("rose", "radiant_rarecolor"),
+    ("lily_of_the_valley", "hardy_rarecolor"),
+]
+
+
+def check_equal_prices():
+    """Returns the failures of the equal-price plans and the keep/sell filters."""
+    catalog = current_catalog()
+    prices = get_prices("gold", 0, 0, 0, catalog=catalog)
+    rose, lily = (catalog.item_index[key] for key in EQUAL_PRICES)
+    stocks = np.zeros(catalog.size, dtype=np.int64)
+    stocks[[rose, lily]] = 1
+
+    def sold(**filters):
+        plans = k_best_solutions(47, "MinimizeStock", stocks, prices, k=5, **filters)
+        return [set(np.flatnonzero(plan["solution"]).tolist()) for plan in plans]
+
+    failures = []
+    for filters, expected in (
+        ({}, [{rose}, {lily}, set()]),
+        ({"keep_items": [rose]}, [{lily}, set()]),
+        ({"sell_items": [rose]}, [{rose}]),
+    ):
+        if sold(**filters) != expected:
+            failures.append(f"equal prices {filters}: {sold(**filters)} != {expected}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--slack",
+        type=float,
+        default=1.0,
+        help="Seconds a call may run past ARITHMANCY_ALTERNATIVES_TIME_LIMIT",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    failures = []
+    print(f"{'workload':<36}{'strategy':<15}{'s':>7}{'peak MB':>9}{'plans':>7}")
+    for currency, budget, stocked, k, min_distance, distinct in WORKLOADS:
+        prices = get_prices(currency, 0, 0, 0).astype(np.int64)
+        stocks = np.where(prices > 0, rng.integers(1, 201, len(prices)), 0)
+        if stocked:
+            keep = rng.choice(np.flatnonzero(prices > 0), stocked, replace=False)
+            stocks = np.where(np.isin(np.arange(len(prices)), keep), stocks, 0)
+        for strategy in ("MinimizeStock", "MaximizeStock"):
+            name = f"{currency} {budget} k={k} d={min_distance} distinct={distinct}"
+            tracemalloc.start()
+            start = time.perf_counter()
+            plans = k_best_solutions(
+                budget,
+                strategy,
+                stocks,
+                prices,
+                k=k,
+                min_distance=min_distance,
+                distinct_items=distinct,
+            )
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            print(f"{name:<36}{strategy:<15}{elapsed:>7.2f}{peak:>9.1f}{len(plans):>7}")
+
+            if elapsed > ALTERNATIVES_TIME_LIMIT + args.slack:
+                failures.append(f"{name} {strategy}: {elapsed:.2f} s")
+            sign = 1 if strategy == "MinimizeStock" else -1
+            best = optimize(budget, strategy, stocks, prices, fast_paths=False)
+            ranks = [
+                (plan["total_price"], sign * plan["total_count"]) for plan in plans
+            ]
+            if not plans or ranks[0] != (
+                best["total_price"],
+                sign * best["total_count"],
+            ):
+                failures.append(f"{name} {strategy}: first plan is not optimal")
+            if ranks != sorted(ranks, reverse=True):
+                failures.append(f"{name} {strategy}: plans out of rank order")
+
+    failures += check_equal_prices()
+    if failures:
+        sys.exit("\n".join(["Benchmark failed:"] + failures))
+
+
+if __name__ == "__main__":
+    main()
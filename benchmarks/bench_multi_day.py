@@ -0,0 +1,90 @@
+"""
+Compare `solver.plan_days` with calling `optimize` once per day on the stock
+left by the days before it, on full-catalog inventories over 30+ days.
+
+Run from anywhere:
+    python benchmarks/bench_multi_day.py [--runs 12] [--days 30] [--seed 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+from solver import get_prices, optimize, plan_days
+
+
+def day_by_day(budgets, strategy, stocks, prices):
+    """Solves each day on its own, on the stock left by the days before it."""
+    stocks = stocks.copy()
+    value = count = 0
+    for budget in budgets:
+        outputs = optimize(budget, strategy, stocks, prices)
+        stocks -= np.asarray(outputs["solution"])
+        value += outputs["total_price"]
+        count += outputs["total_count"]
+    return value, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=12)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    timings = {"day by day": [], "plan_days": []}
+    gains = []
+    print(
+        f"{'run':<5}{'currency':<10}{'stock':<10}{'day by day':>12}{'plan':>12}{'bound':>12}"
+    )
+    for run in range(args.runs):
+        currency = "gold" if run % 2 == 0 else "gems"
+        strategy = "MinimizeStock" if run % 4 < 2 else "MaximizeStock"
+        prices = get_prices(currency, 1, 1, 20).astype(np.int64)
+        # Scarce inventories make the days compete for the same items
+        scarce = run % 3 == 0
+        stocks = np.where(
+            prices > 0, rng.integers(0, 10 if scarce else 120, len(prices)), 0
+        ).astype(np.int64)
+        day_budget = 50000
+        if scarce:
+            # Budgets around the stock value per day, so they just about exhaust it
+            day_budget = int(stocks @ prices) * 11 // (10 * args.days)
+        budgets = rng.integers(day_budget // 2, day_budget + 1, args.days).tolist()
+
+        start = time.perf_counter()
+        value, _ = day_by_day(budgets, strategy, stocks, prices)
+        timings["day by day"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        plan = plan_days(budgets, strategy, stocks, prices)
+        timings["plan_days"].append(time.perf_counter() - start)
+
+        gains.append(plan["total_price"] - value)
+        print(
+            f"{run:<5}{currency:<10}{'scarce' if scarce else 'plenty':<10}"
+            f"{value:>12}{plan['total_price']:>12}{plan['bound']:>12}"
+        )
+
+    print(f"\n{'mode':<15}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for mode, samples in timings.items():
+        samples = np.array(samples) * 1000
+        print(
+            f"{mode:<15}{samples.mean():>10.2f}{np.median(samples):>10.2f}{samples.max():>10.2f}"
+        )
+    print(
+        f"plan_days sold more on {sum(gain > 0 for gain in gains)} runs, "
+        f"less on {sum(gain < 0 for gain in gains)} of {args.runs}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare the two-phase SCIP solve with the single-solve lexicographic objective,
+on stocks up to 200 and, every other run, realistic stocks up to 999, then on
+realistic instances where the weighted objective once returned a wrong count.
+Reports how many problems were too large for the weighted objective and fell
+back to the two-phase solve.
+
+Run from anywhere:
+    python benchmarks/bench_scip_lexicographic.py [--runs 20] [--seed 0]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+import metrics
+from data_loader import BASE_PRICES
+from solver import optimize_scip, optimize_scip_lexicographic
+
+# Seeds of `realistic_instance` on which a single weighted solve was wrong
+REGRESSIONS = [(19, "MaximizeStock")]
+
+
+def realistic_instance(seed):
+    """Gold prices with stocks up to 999 on 70% of the items."""
+    rng = np.random.default_rng(seed)
+    n = len(BASE_PRICES["gold"])
+    prices = BASE_PRICES["gold"] * int(rng.integers(1, 5))
+    stocks = np.where(rng.random(n) < 0.7, rng.integers(0, 1000, n), 0)
+    return prices, stocks.astype(np.int32), int(rng.integers(0, 50001))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = len(BASE_PRICES["gold"])
+    timings = {"two-phase": [], "lexicographic": []}
+
+    fallbacks = 0
+    instances = []
+    for run in range(args.runs):
+        currency = "gold" if run % 2 == 0 else "gems"
+        prices = BASE_PRICES[currency] * int(rng.integers(1, 5))
+        density = rng.random()
+        # Realistic stocks make the weighted objective too large for one solve
+        high = 200
+        if run % 4 >= 2:
+            density, high = 0.7, 1000
+        stocked = rng.random(n) < density
+        stocks = np.where(stocked, rng.integers(0, high, n), 0).astype(np.int32)
+        budget = int(rng.integers(0, 50001))
+        strategy = "MinimizeStock" if rng.random() < 0.5 else "MaximizeStock"
+        instances.append((f"run {run}", prices, stocks, budget, strategy))
+    for seed, strategy in REGRESSIONS:
+        prices, stocks, budget = realistic_instance(seed)
+        instances.append((f"regression {seed}", prices, stocks, budget, strategy))
+
+    for name, prices, stocks, budget, strategy in instances:
+        start = time.perf_counter()
+        reference = optimize_scip(budget, strategy, stocks, prices)
+        timings["two-phase"].append(time.perf_counter() - start)
+
+        with metrics.capture() as records:
+            start = time.perf_counter()
+            result = optimize_scip_lexicographic(budget, strategy, stocks, prices)
+            timings["lexicographic"].append(time.perf_counter() - start)
+        fallbacks += any(
+            record[:2] == ("increment", "lexicographic_fallbacks") for record in records
+        )
+
+        if (result["total_price"], result["total_count"]) != (
+            reference["total_price"],
+            reference["total_count"],
+        ):
+            sys.exit(f"Mismatch on {name}: {reference} != {result}")
+
+    print(f"{'mode':<15}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for mode, samples in timings.items():
+        samples = np.array(samples) * 1000
+        print(
+            f"{mode:<15}{samples.mean():>10.2f}{np.median(samples):>10.2f}{samples.max():>10.2f}"
+        )
+    speedup = np.sum(timings["two-phase"]) / np.sum(timings["lexicographic"])
+    print(f"All {len(instances)} runs matched, speedup x{speedup:.2f}")
+    print(
+        f"{fallbacks} of {len(instances)} runs "
+        f"({fallbacks / len(instances):.0%}) fell back to two phases"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Measure the model-build time the reusable SCIP template saves per request.
+
+Each problem is solved with a freshly built model (`scip_lexicographic`) and
+with the long-lived template (`scip_template`). The SCIP solve itself is
+timed by the `scip_phase1` metric, so the rest of each call is the time
+spent building or updating the model and reading the solution.
+
+Run from anywhere:
+    python benchmarks/bench_scip_template.py [--runs 30] [--no-presolve]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+import metrics
+from data_loader import BASE_PRICES, MAX_BUDGET
+from solver import optimize
+
+
+def timed_solve(backend, problem, reduce):
+    """Returns (total ms, model overhead ms, outputs) of one solve."""
+    with metrics.capture() as records:
+        start = time.perf_counter()
+        outputs = optimize(*problem, backend=backend, reduce=reduce, fast_paths=False)
+        total = time.perf_counter() - start
+    solve = sum(r[2] for r in records if r[:2] == ("observe", "scip_phase1"))
+    return total * 1000, (total - solve) * 1000, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-presolve",
+        action="store_true",
+        help="Feed the full catalog to the backends instead of the presolved problem",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = len(BASE_PRICES["gold"])
+    problems = []
+    for run in range(args.runs):
+        currency = "gold" if run % 2 == 0 else "gems"
+        stocks = np.where(rng.random(n) < rng.random(), rng.integers(0, 200, n), 0)
+        problems.append(
+            (
+                int(rng.integers(0, MAX_BUDGET + 1)),
+                "MinimizeStock" if run % 4 < 2 else "MaximizeStock",
+                stocks.astype(np.int32),
+                BASE_PRICES[currency] * int(rng.integers(1, 5)),
+            )
+        )
+
+    # Build the template outside the measurements, as a warm worker would
+    optimize(
+        *problems[0],
+        backend="scip_template",
+        reduce=not args.no_presolve,
+        fast_paths=False,
+    )
+
+    results = {"scip_lexicographic": [], "scip_template": []}
+    for problem in problems:
+        outputs = {}
+        for backend, samples in results.items():
+            total, overhead, outputs[backend] = timed_solve(
+                backend, problem, not args.no_presolve
+            )
+            samples.append((total, overhead))
+        fresh, template = outputs["scip_lexicographic"], outputs["scip_template"]
+        if (fresh["total_price"], fresh["total_count"]) != (
+            template["total_price"],
+            template["total_count"],
+        ):
+            sys.exit(f"Mismatch: {fresh} != {template}")
+
+    print(f"{'backend':<20}{'total ms':>10}{'model ms':>10}")
+    for backend, samples in results.items():
+        samples = np.array(samples)
+        print(
+            f"{backend:<20}{samples[:, 0].mean():>10.2f}{samples[:, 1].mean():>10.2f}"
+        )
+    saved = (
+        np.array(results["scip_lexicographic"])[:, 1].mean()
+        - np.array(results["scip_template"])[:, 1].mean()
+    )
+    print(f"All {args.runs} runs matched, model time saved per request: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark every solver backend on reproducible synthetic inventories.
+
+Workloads cover sparse and full catalogs, small and maximal budgets, gold and
+gems and both strategies. Each backend reports p50/p95/p99 latency and peak
+traced memory (Python and NumPy allocations; SCIP's own C allocations are not
+traced), and every answer is checked against the two-phase SCIP reference.
+Fast paths for trivial requests are off unless `--fast-paths` is given, so
+every problem reaches the backend.
+The run fails when a backend is slower than the stored baseline by more than
+the tolerance.
+
+Run from anywhere:
+    python benchmarks/bench_solvers.py [--runs 10] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+from data_loader import BASE_PRICES, MAX_BUDGET
+from solver import SOLVER_BACKENDS, optimize
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+WORKLOADS = {
+    f"{density}-{budget}-{currency}-{strategy}": (density, budget, currency, strategy)
+    for density in ("sparse", "full")
+    for budget in ("small", "max")
+    for currency in ("gold", "gems")
+    for strategy in ("MinimizeStock", "MaximizeStock")
+}
+
+
+def generate(workload, runs, seed):
+    """Yields `runs` reproducible (budget, strategy, stocks, prices) problems."""
+    density, budget, currency, strategy = WORKLOADS[workload]
+    rng = np.random.default_rng([seed, list(WORKLOADS).index(workload)])
+    sellable = np.flatnonzero(BASE_PRICES[currency] > 0)
+    for _ in range(runs):
+        stocks = np.zeros(len(BASE_PRICES[currency]), dtype=np.int32)
+        if density == "sparse":
+            chosen = rng.choice(sellable, size=min(8, len(sellable)), replace=False)
+        else:
+            chosen = sellable
+        stocks[chosen] = rng.integers(1, 200, len(chosen))
+        prices = BASE_PRICES[currency] * int(rng.integers(1, 5))
+        value = int(np.sum(stocks * prices))
+        if budget == "small":
+            amount = int(rng.integers(0, min(2000, value) + 1))
+        else:
+            amount = MAX_BUDGET
+        yield amount, strategy, stocks, prices
+
+
+def measure(backend, problems, fast_paths=False):
+    """Returns latencies in ms, peak traced memory in KiB and the outputs."""
+    latencies = []
+    outputs = []
+    tracemalloc.start()
+    for problem in problems:
+        start = time.perf_counter()
+        outputs.append(optimize(*problem, backend=backend, fast_paths=fast_paths))
+        latencies.append((time.perf_counter() - start) * 1000)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return latencies, peak, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", nargs="+", default=list(SOLVER_BACKENDS))
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS))
+    parser.add_argument(
+        "--fast-paths",
+        action="store_true",
+        help="Let trivial requests skip the backend, as in production",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=2.0,
+        help="Allowed slowdown factor of p95 latency against the baseline",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help=f"Store this run's p95 latencies in {os.path.relpath(BASELINE_PATH, ROOT)}",
+    )
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failures = []
+    report = {}
+    print(
+        f"{'workload':<34}{'backend':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'peak KiB':>10}  status"
+    )
+    for workload in args.workloads:
+        problems = list(generate(workload, args.runs, args.seed))
+        _, _, reference = measure("scip", problems)
+        for backend in args.backends:
+            latencies, peak, outputs = measure(backend, problems, args.fast_paths)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            report.setdefault(workload, {})[backend] = round(float(p95), 3)
+
+            status = "ok"
+            for expected, actual in zip(reference, outputs):
+                if (expected["total_price"], expected["total_count"]) != (
+                    actual["total_price"],
+                    actual["total_count"],
+                ):
+                    status = "MISMATCH"
+                    failures.append(f"{workload}/{backend}: {expected} != {actual}")
+                    break
+            allowed = baseline.get(workload, {}).get(backend)
+            # 1 ms of slack keeps sub-millisecond timings from flapping
+            if allowed is not None and p95 > allowed * args.tolerance + 1:
+                status = f"REGRESSED (baseline p95 {allowed:.2f} ms)"
+                failures.append(
+                    f"{workload}/{backend}: p95 {p95:.2f} ms > {allowed} ms"
+                )
+
+            print(
+                f"{workload:<34}{backend:<20}{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+                f"{peak:>10.0f}  {status}"
+            )
+
+    if args.update_baseline:
+        for workload, backends in report.items():
+            baseline.setdefault(workload, {}).update(backends)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+
+    if failures:
+        sys.exit("\n".join(["Benchmark failed:"] + failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Report cold-start latency: catalog import with and without the snapshot,
+solver import, the first solve on each backend and the first formatted
+`get_results` call (which loads the UI module), each in a fresh process.
+
+Run from anywhere:
+    python benchmarks/bench_startup.py [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import data_loader
+catalog = time.perf_counter() - start
+start = time.perf_counter()
+import solver
+imported = time.perf_counter() - start
+# Worth more than the budget over several prices, so no fast path answers it
+inventory = [0] * len(data_loader.ITEM_NAMES)
+inventory[:6] = [30] * 6
+inventory[-1] = 4
+prices = solver.get_prices("gold", 0, 0, 0)
+start = time.perf_counter()
+solver.optimize(1000, "MinimizeStock", inventory, prices, fast_paths=False)
+first_solve = time.perf_counter() - start
+start = time.perf_counter()
+solver.get_results("en", "gold", 1000, 0, 0, 0, "MinimizeStock", *inventory)
+first_results = time.perf_counter() - start
+print(json.dumps({
+    "catalog_ms": catalog * 1000,
+    "solver_import_ms": imported * 1000,
+    "first_solve_ms": first_solve * 1000,
+    "first_results_ms": first_results * 1000,
+    "heavy_modules": sorted(m for m in ("pandas", "pyscipopt", "gradio") if m in sys.modules),
+}))
+"""
+
+
+def probe(backend, snapshot):
+    if not snapshot and os.path.exists(os.path.join(ROOT, "catalog.npz")):
+        os.remove(os.path.join(ROOT, "catalog.npz"))
+    env = dict(os.environ, ARITHMANCY_SOLVER_BACKEND=backend, PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<22}{'catalog ms':>12}{'import ms':>12}{'1st solve ms':>14}"
+        f"{'1st results ms':>16}  heavy modules"
+    )
+    for backend in ("dp", "scip"):
+        for snapshot in (False, True):
+            runs = [probe(backend, snapshot) for _ in range(args.repeat)]
+            best = {
+                key: min(run[key] for run in runs)
+                for key in (
+                    "catalog_ms",
+                    "solver_import_ms",
+                    "first_solve_ms",
+                    "first_results_ms",
+                )
+            }
+            case = f"{backend}, {'snapshot' if snapshot else 'no snapshot'}"
+            print(
+                f"{case:<22}{best['catalog_ms']:>12.1f}{best['solver_import_ms']:>12.1f}"
+                f"{best['first_solve_ms']:>14.1f}{best['first_results_ms']:>16.1f}"
+                f"  {', '.join(runs[-1]['heavy_modules'])}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Measure the bytes the inventory callbacks send to the browser over a scripted
+session (selecting items, switching languages and currencies), compared with
+the former callbacks updating all inventory inputs on every event, and check
+that the diffs leave the inputs as the full updates would.
+
+Run from anywhere:
+    python benchmarks/bench_ui_payload.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # data_loader reads the CSVs relative to the repo root
+sys.path.insert(0, ROOT)
+
+import gradio as gr
+from gradio.state_holder import SessionState
+
+import app
+from ui.display import (
+    DISH_INPUTS,
+    INVENTORY_INDICES,
+    PLANT_INPUTS,
+    TIER_CLASSES,
+    _catalog_index,
+    _inventory_labels,
+    _page,
+)
+
+
+def visible_inputs(plants, dishes, currency):
+    """Indices of the inventory inputs shown for the selected items."""
+    visible_indices = _catalog_index(_page())[2]
+    return {
+        i
+        for is_plant, names in ((True, plants), (False, dishes))
+        for name in names
+        for i in visible_indices.get((is_plant, name, currency), ())
+    }
+
+
+def selected_inputs(plants, dishes):
+    """Indices of the inventory inputs of the selected items."""
+    return {
+        i
+        for is_plant, names in ((True, plants), (False, dishes))
+        for name in names
+        for i in INVENTORY_INDICES.get((is_plant, name), ())
+    }
+
+
+def former_selection_bytes(plants, dishes, currency):
+    """Bytes of the former selector callback, updating all inventory inputs."""
+    selected = selected_inputs(plants, dishes)
+    visible = visible_inputs(plants, dishes, currency)
+    updates = [
+        gr.update(
+            visible=i in visible,
+            elem_classes=[TIER_CLASSES[i]] if i in visible else [],
+        )
+        if i in selected
+        else gr.update(value=0, visible=False)
+        for i in range(len(app.inventory_inputs))
+    ]
+    return len(json.dumps(updates).encode())
+
+
+def former_language_bytes(language):
+    """Bytes of the former language callback, relabelling all inventory inputs."""
+    updates = [
+        gr.update(label=label, info=info)
+        for label, info in _inventory_labels(_page(), language)
+    ]
+    return len(json.dumps(updates).encode())
+
+
+def script():
+    """Yields (step, plants, dishes, currency, language) of a scripted session."""
+    plants = [value for _, value in app.plants_selector.choices]
+    dishes = [value for _, value in app.dishes_selector.choices]
+    yield "select 1 plant", plants[:1], [], "gold", "en"
+    yield "select 3 plants", plants[:3], [], "gold", "en"
+    yield "select 2 dishes", plants[:3], dishes[:2], "gold", "en"
+    yield "language cn", plants[:3], dishes[:2], "gold", "cn"
+    yield "select 8 plants", plants[:8], dishes[:2], "gold", "cn"
+    yield "language ja", plants[:8], dishes[:2], "gold", "ja"
+    yield "deselect dishes", plants[:8], [], "gold", "ja"
+    yield "currency gems", [], [], "gems", "ja"
+    yield "select 3 plants", plants[:3], [], "gems", "ja"
+    yield "language en", plants[:3], [], "gems", "en"
+
+
+async def main():
+    demo = app.demo
+    fns = {block_fn.fn.__name__: block_fn for block_fn in demo.fns.values()}
+    state = SessionState(demo)
+    ids = {block._id: i for i, block in enumerate(app.inventory_inputs)}
+    # The inventory inputs as the browser shows them, starting prerendered
+    shown = [
+        {
+            "label": block.label,
+            "info": block.info,
+            "visible": False,
+            "value": 0,
+            "elem_classes": [],
+        }
+        for block in app.inventory_inputs
+    ]
+
+    async def call(name, inputs):
+        block_fn = fns[name]
+        # State inputs are read from the session
+        inputs = inputs + [None] * (len(block_fn.inputs) - len(inputs))
+        output = await demo.process_api(block_fn=block_fn, inputs=inputs, state=state)
+        for block, update in zip(block_fn.outputs, output["data"]):
+            if block._id in ids:
+                update = {k: v for k, v in update.items() if k != "__type__"}
+                shown[ids[block._id]].update(update)
+        return len(json.dumps(output["data"]).encode())
+
+    previous = ([], [], "gold", "en")
+    totals = [0, 0]
+    print(f"{'step':<18}{'former bytes':>14}{'diff bytes':>12}")
+    for step, plants, dishes, currency, language in script():
+        size = full = 0
+        selection = list(previous[:2])
+        if currency != previous[2]:
+            # The currency change clears both selectors, one change event each
+            selection = [[], []]
+            size += await call("update_plant_inputs", [[], currency, language])
+            size += await call("update_dish_inputs", [[], currency, language])
+            full += former_selection_bytes([], previous[1], currency)
+            full += former_selection_bytes([], [], currency)
+        if language != previous[3]:
+            size += await call("update_inventory_ui_by_language", [language])
+            full += former_language_bytes(language)
+        if plants != selection[0]:
+            size += await call("update_plant_inputs", [plants, currency, language])
+            full += former_selection_bytes(plants, selection[1], currency)
+        if dishes != selection[1]:
+            size += await call("update_dish_inputs", [dishes, currency, language])
+            full += former_selection_bytes(plants, dishes, currency)
+        totals[0] += full
+        totals[1] += size
+        print(f"{step:<18}{full:>14}{size:>12}")
+
+        # The visible inputs must read as after full updates; hidden ones may
+        # keep old labels, but no input may keep a value once deselected
+        selected = selected_inputs(plants, dishes)
+        visible = visible_inputs(plants, dishes, currency)
+        labels = _inventory_labels(_page(), language)
+        for i, (label, info) in enumerate(labels):
+            assert shown[i]["visible"] == (i in visible), (step, i)
+            if i in visible:
+                assert shown[i]["label"] == label, (step, i)
+                assert shown[i]["info"] == info, (step, i)
+                assert shown[i]["elem_classes"] == [TIER_CLASSES[i]], (step, i)
+            if i not in selected:
+                assert shown[i]["value"] == 0, (step, i)
+            elif i in visible:
+                # The user types a count into every input shown
+                shown[i]["value"] = 30
+        previous = (plants, dishes, currency, language)
+
+    print(f"{'total':<18}{totals[0]:>14}{totals[1]:>12}")
+    print(
+        f"{len(app.inventory_inputs)} inventory inputs, "
+        f"{len(PLANT_INPUTS)} plants and {len(DISH_INPUTS)} dishes"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
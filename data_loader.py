@@ -1,13 +1,35 @@
+import hashlib
 import json
+import os
+import tempfile
+import threading
+import zipfile
 
 import numpy as np
-import pandas as pd
 
+CATALOG_SOURCES = ("plants.csv", "dishes.csv", "ui/labels.json")
+SNAPSHOT_PATH = "catalog.npz"
 
-def load_data_from_csv(file_path: str, name_col: str) -> pd.DataFrame:
+MAX_BUDGET = 50000
+# Upper bounds of one inventory count and of the talent price bonus (in %)
+MAX_STOCK = 2000
+MAX_TALENT_BONUS = 1000
+# Upper bound on the number of alternative plans one request may ask for
+MAX_ALTERNATIVES = 10
+# Upper bound on the number of days one multi-day plan may cover
+MAX_PLAN_DAYS = 90
+# Acquisition rate levels of the rate dropdowns (extra rate 0 to +300%)
+RATE_LEVELS = (0, 1, 2, 3)
+# Upper bound on the number of talent bonuses one what-if sweep may compare
+MAX_SWEEP_BONUSES = 25
+
+
+def load_data_from_csv(file_path: str, name_col: str):
     """
     Load data from a CSV file into a pandas DataFrame.
     """
+    import pandas as pd
+
     df = pd.read_csv(
         filepath_or_buffer=file_path,
         dtype={
@@ -22,29 +44,366 @@ def load_data_from_csv(file_path: str, name_col: str) -> pd.DataFrame:
     return df
 
 
-PLANTS_DF = load_data_from_csv("plants.csv", "name")
-DISHES_DF = load_data_from_csv("dishes.csv", "name")
-
-
 def load_labels_from_json() -> dict:
     with open("ui/labels.json", "r", encoding="utf-8") as f:
         labels = json.load(f)
     return labels
 
 
-LABELS = load_labels_from_json()
-PLANTS_LABELS = LABELS["en"]["plants"]
-DISHES_LABELS = LABELS["en"]["dishes"]
-TIERS_LABELS = LABELS["en"]["tiers"]
+def sources_fingerprint(files=CATALOG_SOURCES) -> str:
+    """Returns a hash of the contents of the catalog source files."""
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_snapshot(path=SNAPSHOT_PATH) -> dict:
+    """
+    Compile the CSVs and labels into a single `.npz` snapshot that loads
+    without pandas, and return its arrays.
+    """
+    plants_df = load_data_from_csv("plants.csv", "name")
+    dishes_df = load_data_from_csv("dishes.csv", "name")
+    snapshot = {
+        "fingerprint": np.array(sources_fingerprint()),
+        "names": np.concatenate(
+            [
+                plants_df["name"].astype(str).to_numpy(),
+                dishes_df["name"].astype(str).to_numpy(),
+            ]
+        ).astype(str),
+        "tiers": np.concatenate(
+            [
+                plants_df["tier"].astype(str).to_numpy(),
+                dishes_df["tier"].astype(str).to_numpy(),
+            ]
+        ).astype(str),
+        "is_plant": np.arange(len(plants_df) + len(dishes_df)) < len(plants_df),
+        "gold": np.concatenate([plants_df["gold"], dishes_df["gold"]]).astype(np.int32),
+        "gems": np.concatenate([plants_df["gems"], dishes_df["gems"]]).astype(np.int32),
+        "labels": np.array(json.dumps(load_labels_from_json(), ensure_ascii=False)),
+    }
+    # Written next to `path` and renamed over it, so a process reading the
+    # snapshot meanwhile, or one killed mid-write, never leaves a partial file
+    try:
+        fd, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".npz"
+        )
+    except OSError:
+        # A read-only deployment still works from the freshly parsed data
+        return snapshot
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **snapshot)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except OSError:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    return snapshot
+
+
+def load_snapshot(path=SNAPSHOT_PATH) -> dict:
+    """
+    Load the catalog snapshot, rebuilding it if it is missing, unreadable
+    (e.g. empty or truncated) or was built from different source files.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            snapshot = {key: data[key] for key in data.files}
+        if str(snapshot["fingerprint"]) == sources_fingerprint():
+            return snapshot
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass
+    return build_snapshot(path)
+
+
+class Catalog:
+    """
+    One version of the catalog: the snapshot tables in solver order (plants
+    first, then dishes) and the indexes derived from them, built once so the
+    request path only indexes NumPy arrays.
+
+    A catalog is never modified. Reloading builds a new one and swaps it in,
+    so a request that took a catalog finishes on that version.
+    """
+
+    def __init__(self, version, labels, names, tiers, is_plant, gold, gems):
+        self.version = version
+        self.labels = labels
+        self.item_names = names
+        self.item_tiers = tiers
+        self.is_plant = is_plant
+        self.base_prices = {"gold": gold, "gems": gems}
+        self.size = len(names)
+        self.item_keys: list[tuple[str, str]] = list(
+            zip(names.tolist(), tiers.tolist())
+        )
+        self.item_index: dict[tuple[str, str], int] = {
+            key: i for i, key in enumerate(self.item_keys)
+        }
+
+        # "<name> (<tier>, " per language, completed with the price at request time
+        self.item_label_prefixes = {
+            language: np.array(
+                [
+                    f"{labels['plants' if plant else 'dishes'][name]} ({labels['tiers'][tier]}, "
+                    for name, tier, plant in zip(names, tiers, is_plant)
+                ]
+            )
+            for language, labels in labels.items()
+        }
+
+        # Plants sold for 1 gold are left out of the gold catalog
+        self.gold_plants_mask = is_plant & (gold > 1)
+        self.gems_plants_mask = is_plant & (gems > 0)
+        self.gold_dishes_mask = ~is_plant & (gold > 0)
+        self.gems_dishes_mask = ~is_plant & (gems > 0)
+
+        self._positions = {}
+        self._layouts = {}
+
+    @classmethod
+    def from_snapshot(cls, snapshot) -> "Catalog":
+        return cls(
+            str(snapshot["fingerprint"]),
+            json.loads(str(snapshot["labels"])),
+            snapshot["names"],
+            snapshot["tiers"],
+            snapshot["is_plant"],
+            snapshot["gold"],
+            snapshot["gems"],
+        )
+
+    def positions(self, layout: "Catalog"):
+        """Returns, for every item of `layout`, its index in this catalog or -1."""
+        positions = self._positions.get(layout.version)
+        if positions is None:
+            positions = np.array(
+                [self.item_index.get(key, -1) for key in layout.item_keys],
+                dtype=np.int64,
+            )
+            self._positions[layout.version] = positions
+        return positions
+
+    def stocks_from(self, inventory, layout: "Catalog"):
+        """
+        Converts counts given in the item order of `layout`, e.g. the inventory
+        inputs of a page built from an older version, into a stock vector of
+        this catalog. Items this catalog no longer has are dropped.
+        """
+        counts = np.array([n if n else 0 for n in inventory], dtype=np.int32)
+        if layout is self:
+            return counts
+        positions = self.positions(layout)[: len(counts)]
+        kept = positions >= 0
+        stocks = np.zeros(self.size, dtype=np.int32)
+        stocks[positions[kept]] = counts[: len(positions)][kept]
+        return stocks
+
+    def in_layout(self, layout: "Catalog") -> "Catalog":
+        """
+        This catalog's tables in the item order of `layout`. Items `layout`
+        lacks are left out; items this catalog lacks keep their old labels and
+        have no price.
+        """
+        if layout is self:
+            return self
+        view = self._layouts.get(layout.version)
+        if view is None:
+            positions = self.positions(layout)
+            kept = positions >= 0
+
+            def take(values):
+                return np.where(kept, values[np.maximum(positions, 0)], 0)
+
+            labels = {}
+            for language, texts in self.labels.items():
+                old = layout.labels.get(language, {})
+                labels[language] = dict(
+                    texts,
+                    **{
+                        kind: {**old.get(kind, {}), **texts[kind]}
+                        for kind in ("plants", "dishes", "tiers")
+                    },
+                )
+            view = Catalog(
+                f"{self.version}@{layout.version}",
+                labels,
+                layout.item_names,
+                layout.item_tiers,
+                layout.is_plant,
+                take(self.base_prices["gold"]).astype(np.int32),
+                take(self.base_prices["gems"]).astype(np.int32),
+            )
+            self._layouts[layout.version] = view
+        return view
+
+
+_CATALOG = Catalog.from_snapshot(load_snapshot())
+# The version the Gradio page was built from: its inventory inputs follow this
+# item order until the app restarts
+UI_CATALOG = _CATALOG
+
+_reload_lock = threading.Lock()
+_reload_hooks = []
 
-PLANTS_LABELS_CN = LABELS["cn"]["plants"]
-DISHES_LABELS_CN = LABELS["cn"]["dishes"]
-TIERS_LABELS_CN = LABELS["cn"]["tiers"]
 
-GOLD_PLANTS_DF = PLANTS_DF[
-    PLANTS_DF["gold"] > 1
-]  # Filter out plants with price greater than 1 gold
-GEMS_PLANTS_DF = PLANTS_DF[PLANTS_DF["gems"] > 0]
+def current_catalog() -> Catalog:
+    """Returns the catalog version new requests should use."""
+    return _CATALOG
+
+
+def add_reload_hook(hook):
+    """
+    Registers `hook(catalog)`, called with every reloaded catalog before it
+    is swapped in, to build derived indexes off the request path.
+    """
+    _reload_hooks.append(hook)
+
+
+def reload_catalog() -> bool:
+    """
+    Rebuilds the catalog from the source files and swaps it in if they
+    changed. Returns whether a new version was swapped in.
+    """
+    global _CATALOG
+    with _reload_lock:
+        snapshot = load_snapshot()
+        if str(snapshot["fingerprint"]) == _CATALOG.version:
+            return False
+        catalog = Catalog.from_snapshot(snapshot)
+        for hook in _reload_hooks:
+            hook(catalog)
+        _CATALOG = catalog
+    return True
+
+
+def sources_stat(files=CATALOG_SOURCES) -> tuple:
+    """Returns the size and mtime of the catalog source files, cheap to poll."""
+    stats = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+            stats.append((stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            stats.append(None)
+    return tuple(stats)
+
+
+# Seconds between two checks of the source files; 0 disables hot reload
+CATALOG_POLL_INTERVAL = float(os.environ.get("ARITHMANCY_CATALOG_POLL", "2"))
+
+_WATCHER = None
+
+
+def _watch(interval, stop):
+    import metrics
+
+    # The first check compares contents, catching edits made before the start
+    last = None
+    while not stop.wait(interval):
+        stat = sources_stat()
+        if stat == last:
+            continue
+        try:
+            reloaded = reload_catalog()
+        except Exception:
+            # A half-written or broken file: keep serving the current version
+            # and try again once the files change
+            metrics.increment("catalog_reloads", result="failed")
+        else:
+            if reloaded:
+                metrics.increment("catalog_reloads", result="ok")
+        last = stat
+
+
+def start_catalog_watcher(interval=CATALOG_POLL_INTERVAL):
+    """
+    Start a daemon thread reloading the catalog whenever `plants.csv`,
+    `dishes.csv` or `ui/labels.json` change.
+    """
+    global _WATCHER
+    if _WATCHER is None and interval > 0:
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_watch, args=(interval, stop), name="catalog-watcher", daemon=True
+        )
+        thread.start()
+        _WATCHER = (thread, stop)
+    return _WATCHER
+
+
+def stop_catalog_watcher():
+    """Stop the catalog watcher thread."""
+    global _WATCHER
+    if _WATCHER is not None:
+        thread, stop = _WATCHER
+        stop.set()
+        thread.join()
+        _WATCHER = None
+
+
+# Module attributes of the catalog before it was versioned, resolved against
+# the current version. `from data_loader import X` binds the version of
+# import time; long-lived code should call `current_catalog()` per request.
+_CATALOG_ATTRIBUTES = {
+    "LABELS": lambda c: c.labels,
+    "PLANTS_LABELS": lambda c: c.labels["en"]["plants"],
+    "DISHES_LABELS": lambda c: c.labels["en"]["dishes"],
+    "TIERS_LABELS": lambda c: c.labels["en"]["tiers"],
+    "PLANTS_LABELS_CN": lambda c: c.labels["cn"]["plants"],
+    "DISHES_LABELS_CN": lambda c: c.labels["cn"]["dishes"],
+    "TIERS_LABELS_CN": lambda c: c.labels["cn"]["tiers"],
+    "ITEM_NAMES": lambda c: c.item_names,
+    "ITEM_TIERS": lambda c: c.item_tiers,
+    "IS_PLANT": lambda c: c.is_plant,
+    "BASE_PRICES": lambda c: c.base_prices,
+    "ITEM_LABEL_PREFIXES": lambda c: c.item_label_prefixes,
+    "GOLD_PLANTS_MASK": lambda c: c.gold_plants_mask,
+    "GEMS_PLANTS_MASK": lambda c: c.gems_plants_mask,
+    "GOLD_DISHES_MASK": lambda c: c.gold_dishes_mask,
+    "GEMS_DISHES_MASK": lambda c: c.gems_dishes_mask,
+}
+
+_DATAFRAMES = {}
+
+
+def __getattr__(name):
+    """
+    Resolve the catalog tables against the current version, and build the
+    pandas DataFrames (`PLANTS_DF`, `GOLD_PLANTS_DF`, ...) on first access
+    per version, so that importing the catalog does not import pandas.
+    """
+    if name in _CATALOG_ATTRIBUTES:
+        return _CATALOG_ATTRIBUTES[name](_CATALOG)
+    if name not in (
+        "PLANTS_DF",
+        "DISHES_DF",
+        "GOLD_PLANTS_DF",
+        "GEMS_PLANTS_DF",
+        "GOLD_DISHES_DF",
+        "GEMS_DISHES_DF",
+    ):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _DATAFRAMES.get("version") != _CATALOG.version:
+        plants_df = load_data_from_csv("plants.csv", "name")
+        dishes_df = load_data_from_csv("dishes.csv", "name")
+        _DATAFRAMES.clear()
+        _DATAFRAMES.update(
+            version=_CATALOG.version,
+            PLANTS_DF=plants_df,
+            DISHES_DF=dishes_df,
+            GOLD_PLANTS_DF=plants_df[plants_df["gold"] > 1],
+            GEMS_PLANTS_DF=plants_df[plants_df["gems"] > 0],
+            GOLD_DISHES_DF=dishes_df[dishes_df["gold"] > 0],
+            GEMS_DISHES_DF=dishes_df[dishes_df["gems"] > 0],
+        )
+    return _DATAFRAMES[name]
+
 
-GOLD_DISHES_DF = DISHES_DF[DISHES_DF["gold"] > 0]
-GEMS_DISHES_DF = DISHES_DF[DISHES_DF["gems"] > 0]
+if __name__ == "__main__":
+    # Build step of the deployment: compile the snapshot shipped with the app
+    build_snapshot()
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Set ARITHMANCY_METRICS=0 to turn every hook below into a no-op
+METRICS_ENABLED = os.environ.get("ARITHMANCY_METRICS", "1") != "0"
+
+# Histogram buckets in seconds, from sub-millisecond DP solves to slow MIPs
+BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+# Stages timed on the request path:
+#   schedule_wait  waiting for a solve slot in the scheduler
+#   queue_wait     waiting for a free solver worker process
+#   prices         price vector construction in get_results
+#   solve          the whole `optimize` call, presolve included
+#   scip_phase1    SCIP solve for the best total value
+#   scip_phase2    SCIP re-solve for the item count after freeTransform
+#   sensitivity    per-item marginal values of the final answer
+#   format         labelling and format_results
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> [bucket counts..., +Inf count, sum]
+_counters = {}  # (name, sorted label items) -> value
+_capture = threading.local()
+
+
+def observe(stage, seconds):
+    """Records one duration of `stage` in its histogram."""
+    if not METRICS_ENABLED:
+        return
+    records = getattr(_capture, "records", None)
+    if records is not None:
+        records.append(("observe", stage, seconds))
+        return
+    with _lock:
+        histogram = _histograms.setdefault(stage, [0] * (len(BUCKETS) + 2))
+        histogram[bisect_left(BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+def increment(name, amount=1, **labels):
+    """Adds `amount` to the counter `name` with the given labels."""
+    if not METRICS_ENABLED:
+        return
+    records = getattr(_capture, "records", None)
+    if records is not None:
+        records.append(("increment", name, amount, labels))
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+@contextmanager
+def _timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Context manager timing its block as one observation of `stage`."""
+    return _timed(stage) if METRICS_ENABLED else nullcontext()
+
+
+@contextmanager
+def capture():
+    """
+    Collects the observations made in this thread instead of recording them,
+    so a worker process can send them back to be `replay`ed by the parent.
+    """
+    _capture.records = []
+    try:
+        yield _capture.records
+    finally:
+        _capture.records = None
+
+
+def replay(records):
+    """Records observations collected by `capture` in another process."""
+    for record in records:
+        if record[0] == "observe":
+            observe(*record[1:])
+        else:
+            increment(record[1], record[2], **record[3])
+
+
+def render() -> str:
+    """Returns all metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP arithmancy_stage_seconds Time spent per request stage.",
+        "# TYPE arithmancy_stage_seconds histogram",
+    ]
+    with _lock:
+        histograms = {stage: list(values) for stage, values in _histograms.items()}
+        counters = dict(_counters)
+
+    for stage in sorted(histograms):
+        values = histograms[stage]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), values[:-1]):
+            cumulative += count
+            lines.append(
+                f'arithmancy_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(f'arithmancy_stage_seconds_sum{{stage="{stage}"}} {values[-1]}')
+        lines.append(f'arithmancy_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+    names = sorted({name for name, _ in counters})
+    for name in names:
+        lines.append(f"# TYPE arithmancy_{name}_total counter")
+        for (counter, labels), value in sorted(counters.items()):
+            if counter != name:
+                continue
+            label_text = ",".join(f'{key}="{label}"' for key, label in labels)
+            lines.append(
+                f"arithmancy_{name}_total{{{label_text}}} {value}"
+                if label_text
+                else f"arithmancy_{name}_total {value}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def mount_metrics(app, path="/metrics"):
+    """Adds a Prometheus text endpoint to the FastAPI app serving the Gradio Blocks."""
+    from fastapi.responses import PlainTextResponse
+
+    app.add_api_route(
+        path,
+        lambda: PlainTextResponse(
+            render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        ),
+        methods=["GET"],
+        include_in_schema=False,
+    )
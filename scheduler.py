@@ -0,0 +1,140 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+# Solves allowed to run at once; the rest wait in `SCHEDULER`. Defaults to the
+# size of the solver process pool.
+SOLVE_SLOTS = max(
+    int(
+        os.environ.get(
+            "ARITHMANCY_SOLVE_SLOTS",
+            os.environ.get("ARITHMANCY_SOLVER_WORKERS", os.cpu_count() or 1),
+        )
+    ),
+    1,
+)
+
+
+class SingleFlight:
+    """
+    A registry of the solves in progress, keyed on the canonical solver input.
+
+    The first caller of `run` for a key computes the result; callers arriving
+    with the same key while it runs wait for that computation and share its
+    result (or its exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn, *args):
+        """Returns `fn(*args)`, computed once for all concurrent callers of `key`."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.followers += 1
+        metrics.increment("single_flight", role="leader" if leader else "follower")
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        """Returns the number of computations, coalesced callers and solves in progress."""
+        with self._lock:
+            total = self.leaders + self.followers
+            return {
+                "leaders": self.leaders,
+                "followers": self.followers,
+                "coalesced_rate": self.followers / total if total else 0.0,
+                "in_flight": len(self._calls),
+            }
+
+
+class SolveScheduler:
+    """
+    Admits at most `slots` solves at once. Waiting solves start in order of
+    arrival time plus estimated cost, so a cheap request overtakes expensive
+    ones queued shortly before it, while an expensive one still starts once
+    it has waited about as long as its own estimate.
+    """
+
+    def __init__(self, slots=SOLVE_SLOTS):
+        self.slots = slots
+        self.running = 0
+        self.admitted = 0
+        self.overtaken = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._waiting = []  # heap of (priority, sequence)
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+
+    def run(self, cost, fn, *args):
+        """Runs `fn(*args)` in a free slot; `cost` is its estimated time in seconds."""
+        arrived = time.perf_counter()
+        ticket = (arrived + cost, next(self._order))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            while self.running >= self.slots or self._waiting[0] != ticket:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self.running += 1
+            wait = time.perf_counter() - arrived
+            self.admitted += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            # Requests that arrived earlier but are still waiting
+            overtaken = sum(1 for _, sequence in self._waiting if sequence < ticket[1])
+            self.overtaken += overtaken
+            # Another slot may be free for the next ticket in line
+            self._condition.notify_all()
+        metrics.observe("schedule_wait", wait)
+        if overtaken:
+            metrics.increment("scheduler_overtakes", overtaken)
+
+        try:
+            return fn(*args)
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> dict:
+        """Returns the queue length, running solves and queue-wait statistics."""
+        with self._condition:
+            return {
+                "slots": self.slots,
+                "running": self.running,
+                "waiting": len(self._waiting),
+                "admitted": self.admitted,
+                "overtaken": self.overtaken,
+                "mean_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+IN_FLIGHT = SingleFlight()
+SCHEDULER = SolveScheduler()
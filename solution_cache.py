@@ -0,0 +1,157 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from data_loader import current_catalog
+
+
+def solution_key(budget, strategy, stocks, sold_prices) -> str:
+    """
+    Returns a canonical hash of the solver input.
+
+    Only items with nonzero stock take part, so inventories that differ in
+    unstocked items (or in the prices of unstocked items) share a key.
+    """
+    stocks = np.asarray(stocks, dtype=np.int64)
+    indices = np.flatnonzero(stocks > 0)
+    digest = hashlib.sha256()
+    digest.update(f"{int(budget or 0)}|{strategy}|{len(stocks)}|".encode())
+    digest.update(indices.astype(np.int64).tobytes())
+    digest.update(stocks[indices].tobytes())
+    digest.update(np.asarray(sold_prices, dtype=np.int64)[indices].tobytes())
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    """
+    A thread-safe LRU cache of solver outputs with an optional on-disk store.
+
+    The store is an SQLite database, so several processes (e.g. the workers
+    of `api.py --workers`) can share it; each process opens its own
+    connection.
+
+    Entries are tied to the catalog version: when a new version is swapped
+    in, the in-memory entries are dropped and on-disk entries written for the
+    old catalog are no longer found. A solve that started on the old version
+    passes it as `version`, so its answer is not stored under the new one.
+    """
+
+    def __init__(self, maxsize=1024, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = current_catalog().version
+        self._connection = None
+        self._pid = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _store(self) -> sqlite3.Connection:
+        """
+        Returns this process's connection to the on-disk store. A forked
+        process must not reuse its parent's connection, so it opens its own.
+        """
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            connection.commit()
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def _check_catalog(self, version):
+        """Returns whether `version` is current, dropping entries of older ones."""
+        current = current_catalog().version
+        if current != self._version:
+            self._version = current
+            self._entries.clear()
+        return version is None or version == current
+
+    def get(self, key, version=None):
+        """Returns the cached output for `key` under catalog `version`, or None."""
+        with self._lock:
+            if not self._check_catalog(version):
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self.path:
+                row = (
+                    self._store()
+                    .execute(
+                        "SELECT value FROM solutions WHERE key = ?",
+                        (f"{self._version}:{key}",),
+                    )
+                    .fetchone()
+                )
+                if row is not None:
+                    value = pickle.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        """
+        Stores the output for `key` in memory and, if enabled, on disk.
+        Approximate answers, and answers computed on an older catalog
+        `version`, are not stored.
+        """
+        if not value.get("optimal", True):
+            return
+        with self._lock:
+            if not self._check_catalog(version):
+                return
+            self._remember(key, value)
+            if self.path:
+                # The connection commits on leaving the block
+                with self._store() as store:
+                    store.execute(
+                        "INSERT OR REPLACE INTO solutions VALUES (?, ?)",
+                        (f"{self._version}:{key}", pickle.dumps(value)),
+                    )
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops the in-memory entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+SOLUTION_CACHE = SolutionCache(
+    maxsize=int(os.environ.get("ARITHMANCY_CACHE_SIZE", "1024")),
+    path=os.environ.get("ARITHMANCY_CACHE_PATH") or None,
+)
@@ -1,22 +1,110 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache, partial
 
 import numpy as np
 from numpy.typing import NDArray
-from pyscipopt import Model, quicksum
 
-from ui.display import format_results
+import metrics
+from scheduler import IN_FLIGHT, SCHEDULER
+from solution_cache import SOLUTION_CACHE, solution_key
 
 from data_loader import (
-    DISHES_DF,
-    LABELS,
-    PLANTS_DF,
+    MAX_ALTERNATIVES,
+    MAX_BUDGET,
+    MAX_PLAN_DAYS,
+    MAX_SWEEP_BONUSES,
+    MAX_TALENT_BONUS,
+    RATE_LEVELS,
+    UI_CATALOG,
+    current_catalog,
 )
 
 
-def optimize(budget, strategy, stocks, sold_prices):
+# Latency budget of one SCIP solve: past it, the best solution found so far is
+# returned with its optimality gap. A limit of 0 (or -1 nodes) is unlimited.
+SOLVE_TIME_LIMIT = float(os.environ.get("ARITHMANCY_SOLVE_TIME_LIMIT", "10"))
+SOLVE_NODE_LIMIT = int(os.environ.get("ARITHMANCY_SOLVE_NODE_LIMIT", "-1"))
+
+
+def solution_outputs(solution, budget, sold_prices, bound=None, optimal=None) -> dict:
+    """
+    Builds the outputs dict shared by every backend from per-item counts.
+
+    `bound` is a proven upper bound on the total value (the total value
+    itself when omitted); the optimality gap is measured against it.
+    `optimal` defaults to whether the bound is attained.
+    """
+    solution = np.asarray(solution, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    solution = np.where((solution > 0) & (sold_prices > 0), solution, 0)
+    total_value = int(solution @ sold_prices)
+    # No answer can exceed the budget, whatever bound the solver proved
+    bound = total_value if bound is None else max(min(int(bound), budget), total_value)
+    return {
+        "solution": solution.tolist(),
+        "total_price": total_value,
+        "total_count": int(solution.sum()),
+        "remaining": int(budget - total_value),
+        "optimal": bound == total_value if optimal is None else bool(optimal),
+        "gap": (bound - total_value) / bound if bound else 0.0,
+        "bound": bound,
+    }
+
+
+def greedy_solution(budget, strategy, stocks, sold_prices) -> dict:
+    """
+    A fast feasible answer: sell the most valuable items first while they fit
+    the budget. Used to seed SCIP so a limited solve always has an incumbent,
+    and as the first answer of `get_results_stream`.
+    """
+    budget = max(int(budget or 0), 0)
+    stocks = np.asarray(stocks, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    sellable = np.flatnonzero((stocks > 0) & (sold_prices > 0))
+    prices = sold_prices[sellable]
+    order = sellable[np.argsort(-prices, kind="stable")]
+    solution, _ = _greedy_fill(budget, order, stocks, sold_prices)
+
+    # Every total is a multiple of the price gcd within the inventory value
+    bound = min(budget, int(stocks[sellable] @ prices))
+    if len(sellable):
+        bound -= bound % int(np.gcd.reduce(prices))
+    return solution_outputs(solution, budget, sold_prices, bound=bound)
+
+
+def _limit_scip(model, variables=None, seed=None):
+    """Applies the latency budget to `model` and adds `seed` counts as a start solution."""
+    if SOLVE_TIME_LIMIT > 0:
+        model.setParam("limits/time", SOLVE_TIME_LIMIT)
+    model.setParam("limits/nodes", SOLVE_NODE_LIMIT)
+    if seed is not None:
+        start = model.createSol()
+        for var, count in zip(variables, seed):
+            model.setSolVal(start, var, count)
+        model.addSol(start)
+
+
+def _best_counts(model, variables) -> list[int]:
+    """Reads the incumbent counts, raising `ValueError` if SCIP found no solution."""
+    if model.getNSols() == 0:
+        raise ValueError(
+            f"Optimization failed with status: {model.getStatus()} at {datetime.now()}"
+        )
+    best = model.getBestSol()
+    return [round(model.getSolVal(best, var)) for var in variables]
+
+
+def optimize_scip(budget, strategy, stocks, sold_prices):
     """
     Calculate the optimal solution of item sales based on the given budget
-    and inventory constraints.
+    and inventory constraints, using a SCIP integer program.
 
     Args:
         - budget (int): The total budget available for purchasing items.
@@ -27,6 +115,9 @@ def optimize(budget, strategy, stocks, sold_prices):
     Returns:
         - dict: A dictionary containing the solution, total price, total count,
     """
+    # pyscipopt is only imported once the SCIP backend is first used
+    from pyscipopt import Model, quicksum
+
     # Initialize the master problem
     model = Model("Knapsack")
 
@@ -48,91 +139,1951 @@ def optimize(budget, strategy, stocks, sold_prices):
 
     # first optimize
     model.hideOutput()
-    model.optimize()
-
-    if model.getStatus() == "optimal":
-        optimal_total_value = model.getObjVal()
-        model.freeTransform()
+    _limit_scip(
+        model, x, greedy_solution(budget, strategy, stocks, sold_prices)["solution"]
+    )
+    with metrics.timed("scip_phase1"):
+        model.optimize()
+    metrics.increment("solver_status", backend="scip", status=model.getStatus())
 
-        model.setObjective(
-            obj2, "maximize" if strategy == "MinimizeStock" else "minimize"
+    incumbent = _best_counts(model, x)
+    if model.getStatus() != "optimal":
+        # Out of time: the count is not refined, the value is bounded by SCIP
+        return solution_outputs(
+            incumbent, budget, sold_prices, bound=int(model.getDualbound() + 1e-6)
         )
-        model.addCons(obj1 == optimal_total_value)
+
+    optimal_total_value = model.getObjVal()
+    model.freeTransform()
+
+    model.setObjective(obj2, "maximize" if strategy == "MinimizeStock" else "minimize")
+    model.addCons(obj1 == optimal_total_value)
+    _limit_scip(model, x, incumbent)
+    with metrics.timed("scip_phase2"):
         model.optimize()
+    metrics.increment("solver_status", backend="scip", status=model.getStatus())
 
-        # Final solution processing
-        solution = [0] * len(x)
-        total_value = 0
-        total_count = 0
-
-        if model.getStatus() == "optimal":
-            for i, var in enumerate(x):
-                if (n := round(model.getVal(var))) > 0 and sold_prices[i] > 0:
-                    solution[i] = n
-                    total_count += n
-                    total_value += n * sold_prices[i]
-
-            return {
-                "solution": solution,
-                "total_price": int(total_value),
-                "total_count": int(total_count),
-                "remaining": int(budget - total_value),
-            }
-    raise ValueError(
-        f"Optimization failed with status: {model.getStatus()} at {datetime.now()}"
+    # Final solution processing
+    return solution_outputs(
+        _best_counts(model, x),
+        budget,
+        sold_prices,
+        optimal=model.getStatus() == "optimal",
     )
 
 
-def get_results(
-    language,
-    currency,
-    budget,
-    plants_prices_extra_rate,
-    dishes_prices_extra_rate,
-    talent_price_bonus,
-    strategy,
-    *inventory,
-):
-    talent_price_bonus = talent_price_bonus or 0
-    prices: NDArray[np.int16] = np.concat(
-        [
-            PLANTS_DF[currency] * (1 + plants_prices_extra_rate),
-            np.floor(
-                DISHES_DF[currency]
-                * (1 + dishes_prices_extra_rate)
-                * (1 + talent_price_bonus / 100)
-            ).astype(
-                np.int16
-            ),  # Licet(@discord)'s data shows that all values are rounded down: https://docs.google.com/spreadsheets/d/1CWv0VmgfKKWWlqUty9hqGwWt86_G94x5K89DP4b4eRI
-        ],
-        dtype=np.int16,
+# Largest weighted objective `weight * value` solved in one go. SCIP compares
+# objective values up to a relative tolerance of about 1e-9, so past this the
+# tolerance nears one unit of item count and the weighted optimum can be
+# certified at the wrong count; such problems are solved in two phases.
+# Tighter `numerics/epsilon` or `numerics/dualfeastol` do not make larger
+# objectives exact (counts still come out one or two units off from about
+# 10**8), and `lexicographic_fallbacks_total` at `/metrics` counts the
+# problems solved in two phases instead.
+LEXICOGRAPHIC_MAX_OBJECTIVE = 10**7
+
+
+def _lexicographic_bound(dual_bound, weight, sign) -> int:
+    """
+    Upper bound on the total value implied by a dual bound of the weighted
+    objective `weight * value + sign * count`, with count below `weight`.
+    """
+    slack = weight - 1 if sign < 0 else 0
+    return int((dual_bound + 1e-6 + slack) // weight)
+
+
+def optimize_scip_lexicographic(budget, strategy, stocks, sold_prices):
+    """
+    Calculate the optimal solution of item sales with a single SCIP solve.
+
+    Value and item count are folded into one integer objective
+    `weight * value ± count`, where `weight` exceeds any achievable item
+    count. Since values are integers, one more unit of value always outweighs
+    the largest possible count difference, so the optimum is the same as the
+    two-phase solve in `optimize_scip`. Problems whose weighted objective
+    could exceed `LEXICOGRAPHIC_MAX_OBJECTIVE` go to `optimize_scip` instead.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+
+    Returns:
+        - dict: A dictionary containing the solution, total price, total count,
+    """
+    from pyscipopt import Model, quicksum
+
+    upper_bounds = [
+        min(int(stocks[i]), int(budget) // int(sold_prices[i]))
+        if stocks[i] and sold_prices[i] > 0
+        else 0
+        for i in range(len(stocks))
+    ]
+    # Any count difference is at most sum(upper_bounds) < weight
+    weight = sum(upper_bounds) + 1
+    sign = 1 if strategy == "MinimizeStock" else -1
+    if weight * int(budget) > LEXICOGRAPHIC_MAX_OBJECTIVE:
+        metrics.increment("lexicographic_fallbacks", backend="scip_lexicographic")
+        return optimize_scip(budget, strategy, stocks, sold_prices)
+
+    model = Model("Knapsack")
+    x = [
+        model.addVar(vtype="I", name=f"x_{i}", lb=0, ub=upper_bounds[i])
+        for i in range(len(stocks))
+    ]
+
+    total_value = quicksum(int(sold_prices[i]) * x[i] for i in range(len(stocks)))
+    total_count = quicksum(x[i] for i in range(len(stocks)))
+
+    model.setObjective(weight * total_value + sign * total_count, "maximize")
+    model.addCons(total_value <= budget)
+
+    # The weighted objective only separates counts if solved to zero gap
+    model.setParam("limits/gap", 0.0)
+    model.hideOutput()
+    _limit_scip(
+        model, x, greedy_solution(budget, strategy, stocks, sold_prices)["solution"]
     )
-    outputs = optimize(
+    with metrics.timed("scip_phase1"):
+        model.optimize()
+    status = model.getStatus()
+    metrics.increment("solver_status", backend="scip_lexicographic", status=status)
+
+    return solution_outputs(
+        _best_counts(model, x),
         budget,
-        strategy,
-        np.array([n if n else 0 for n in inventory], dtype=np.int16),
-        prices,
+        sold_prices,
+        bound=_lexicographic_bound(model.getDualbound(), weight, sign),
+        optimal=status == "optimal",
     )
-    plants_solution = outputs["solution"][: len(PLANTS_DF)]
-    dishes_solution = outputs["solution"][
-        len(PLANTS_DF) : len(PLANTS_DF) + len(DISHES_DF)
-    ]
-    results = {}
-    results["solution"] = {
-        f"{LABELS[language]['plants'][PLANTS_DF.iloc[i]['name']]} ({LABELS[language]['tiers'][PLANTS_DF.iloc[i]['tier']]}, {int(prices[i])} {currency})": plants_solution[
-            i
+
+
+class ScipModelTemplate:
+    """
+    A long-lived SCIP model with one variable per catalog item, reused across
+    requests.
+
+    Each solve only changes variable upper bounds (stocks), the budget
+    constraint's coefficients (prices) and right-hand side, and the weighted
+    objective of `optimize_scip_lexicographic`, then frees the transformed
+    problem so the next request starts from the original one. Problems
+    smaller than the template (e.g. after `presolve`) leave the unused
+    variables fixed at 0. Problems past `LEXICOGRAPHIC_MAX_OBJECTIVE` are
+    solved in two phases, the second one fixing the value by raising the
+    left-hand side of the budget constraint to the first phase's optimum.
+    """
+
+    def __init__(self, size):
+        from pyscipopt import Model, quicksum
+
+        self.size = size
+        self.model = Model("Knapsack")
+        self.model.hideOutput()
+        # The weighted objective only separates counts if solved to zero gap
+        self.model.setParam("limits/gap", 0.0)
+        # Created unbounded: SCIP turns integer variables bounded by [0, 1]
+        # into binaries, which could not take larger stocks later
+        self.x = [
+            self.model.addVar(vtype="I", name=f"x_{i}", lb=0, ub=None)
+            for i in range(size)
         ]
-        for i in range(len(PLANTS_DF))
-        if plants_solution[i] > 0
-    }
-    results["solution"].update({
-        f"{LABELS[language]['dishes'][DISHES_DF.iloc[i]['name']]} ({LABELS[language]['tiers'][DISHES_DF.iloc[i]['tier']]}, {int(prices[len(PLANTS_DF) + i])} {currency})": dishes_solution[
-            i
+        self.budget = self.model.addCons(quicksum(self.x) <= 0)
+        self.lock = threading.Lock()
+
+    def solve(self, budget, strategy, stocks, sold_prices):
+        """
+        Calculate the optimal solution of item sales on the template model.
+
+        Returns:
+            - dict: A dictionary containing the solution, total price, total count,
+        """
+        from pyscipopt import quicksum
+
+        n = len(stocks)
+        upper_bounds = [
+            min(int(stocks[i]), int(budget) // int(sold_prices[i]))
+            if stocks[i] and sold_prices[i] > 0
+            else 0
+            for i in range(n)
+        ] + [0] * (self.size - n)
+        # Unused variables keep a positive coefficient so they stay in the row
+        coefficients = [
+            int(sold_prices[i]) if sold_prices[i] > 0 else 1 for i in range(n)
+        ] + [1] * (self.size - n)
+        weight = sum(upper_bounds) + 1
+        sign = 1 if strategy == "MinimizeStock" else -1
+
+        weighted = weight * int(budget) <= LEXICOGRAPHIC_MAX_OBJECTIVE
+        if not weighted:
+            metrics.increment("lexicographic_fallbacks", backend="scip_template")
+        live = [
+            (var, c) for var, ub, c in zip(self.x, upper_bounds, coefficients) if ub
         ]
-        for i in range(len(DISHES_DF))
-        if dishes_solution[i] > 0
-    })
-    results["total_price"] = outputs["total_price"]
-    results["total_count"] = outputs["total_count"]
-    results["remaining"] = outputs["remaining"]
-    return format_results(results, language)
+
+        with self.lock:
+            model = self.model
+            for var, ub, coefficient in zip(self.x, upper_bounds, coefficients):
+                model.chgVarUb(var, ub)
+                model.chgCoefLinear(self.budget, var, coefficient)
+            model.chgLhs(self.budget, None)
+            model.chgRhs(self.budget, int(budget))
+            model.setObjective(
+                quicksum(
+                    (weight * coefficient + sign if weighted else coefficient) * var
+                    for var, coefficient in live
+                ),
+                "maximize",
+            )
+
+            seed = greedy_solution(budget, strategy, stocks, sold_prices)["solution"]
+            _limit_scip(model, self.x, seed + [0] * (self.size - n))
+            with metrics.timed("scip_phase1"):
+                model.optimize()
+            status = model.getStatus()
+            metrics.increment("solver_status", backend="scip_template", status=status)
+            try:
+                solution = _best_counts(model, self.x[:n])
+                if weighted:
+                    bound = _lexicographic_bound(model.getDualbound(), weight, sign)
+                else:
+                    bound = int(model.getDualbound() + 1e-6)
+            finally:
+                model.freeTransform()
+
+            if not weighted and status == "optimal":
+                # Second phase: the best count at the optimal value
+                value = sum(c * count for c, count in zip(coefficients, solution))
+                model.chgLhs(self.budget, value)
+                model.setObjective(quicksum(sign * var for var, _ in live), "maximize")
+                _limit_scip(model, self.x, solution + [0] * (self.size - n))
+                with metrics.timed("scip_phase2"):
+                    model.optimize()
+                status = model.getStatus()
+                metrics.increment(
+                    "solver_status", backend="scip_template", status=status
+                )
+                try:
+                    solution = _best_counts(model, self.x[:n])
+                finally:
+                    model.freeTransform()
+
+        return solution_outputs(
+            solution, budget, sold_prices, bound=bound, optimal=status == "optimal"
+        )
+
+
+_SCIP_TEMPLATE = None
+
+
+def optimize_scip_template(budget, strategy, stocks, sold_prices):
+    """
+    Calculate the optimal solution of item sales on this process's
+    `ScipModelTemplate`, built on first use with one variable per catalog item.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+
+    Returns:
+        - dict: A dictionary containing the solution, total price, total count,
+    """
+    global _SCIP_TEMPLATE
+    if _SCIP_TEMPLATE is None or _SCIP_TEMPLATE.size < len(stocks):
+        _SCIP_TEMPLATE = ScipModelTemplate(max(current_catalog().size, len(stocks)))
+    return _SCIP_TEMPLATE.solve(budget, strategy, stocks, sold_prices)
+
+
+def _split_stock(stock: int) -> list[int]:
+    """
+    Split a stock count into binary chunks (1, 2, 4, ..., rest) so that every
+    count in 0..stock is the sum of exactly one subset of the chunks.
+    """
+    chunks = []
+    k = 1
+    while stock > 0:
+        take = min(k, stock)
+        chunks.append(take)
+        stock -= take
+        k *= 2
+    return chunks
+
+
+def _packed_bit(packed: NDArray[np.uint8], index: int) -> bool:
+    """Read one flag from an array produced by `np.packbits`."""
+    return bool((packed[index >> 3] >> (7 - (index & 7))) & 1)
+
+
+_UNREACHABLE = np.iinfo(np.int64).min // 2
+
+
+class BudgetFrontier:
+    """
+    The reachable-value table of one inventory, shared by every budget up to
+    `max_budget`.
+
+    Every reachable total value keeps the best item count that reaches it, so
+    the value-first/count-second objective of `optimize_scip` is answered
+    exactly for any budget: the best total is a table lookup and the matching
+    solution is rebuilt by walking the stored item chunks backwards.
+    """
+
+    def __init__(self, strategy, stocks, sold_prices, max_budget=MAX_BUDGET):
+        self.prices = np.asarray(sold_prices, dtype=np.int64)
+        self.size = len(self.prices)
+        self.strategy = strategy
+        # MinimizeStock sells as many items as possible, MaximizeStock as few
+        self.sign = 1 if strategy == "MinimizeStock" else -1
+        self.max_budget = max(int(max_budget or 0), 0)
+
+        # Stock covered by the table, and the part of it that fits the capacity
+        self.stocks = np.zeros(self.size, dtype=np.int64)
+        self.usable = np.zeros(self.size, dtype=np.int64)
+        self.capacity = 0
+        self.best = np.zeros(1, dtype=np.int64)
+        # (item index, chunk size, chunk value, packed "chunk taken" flags)
+        self.chunks = []
+        self._grow(stocks)
+
+    def extend(self, stocks) -> bool:
+        """
+        Updates the table in place for an inventory holding at least the
+        current stock of every item, in time proportional to the added stock.
+        Returns False, leaving the table untouched, if any stock decreased.
+        """
+        stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+        if len(stocks) != self.size or np.any(stocks < self.stocks):
+            return False
+        if np.any(stocks > self.stocks):
+            self._grow(stocks)
+        return True
+
+    def _grow(self, stocks):
+        stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+        priced = self.prices > 0
+        capacity = min(self.max_budget, int(np.sum(stocks * self.prices * priced)))
+
+        # The capacity only grows when it was the full inventory value, so no
+        # combination of the existing chunks lies beyond the old table
+        if capacity > self.capacity:
+            self.best = np.concatenate(
+                [self.best, np.full(capacity - self.capacity, _UNREACHABLE)]
+            )
+        usable = np.where(
+            priced, np.minimum(stocks, capacity // np.maximum(self.prices, 1)), 0
+        )
+
+        best = self.best
+        for i in np.flatnonzero(usable > self.usable):
+            price = int(self.prices[i])
+            for k in _split_stock(int(usable[i] - self.usable[i])):
+                weight = k * price
+                candidate = best[:-weight] + self.sign * k
+                # Only extend values that are reachable themselves
+                taken = (candidate > best[weight:]) & (best[:-weight] > _UNREACHABLE)
+                best[weight:][taken] = candidate[taken]
+                self.chunks.append((i, k, weight, np.packbits(taken)))
+
+        self.stocks = stocks
+        self.usable = usable
+        self.capacity = capacity
+        self.reachable = best > _UNREACHABLE
+        # Largest reachable total value not above each budget
+        self.floor = np.maximum.accumulate(
+            np.where(self.reachable, np.arange(capacity + 1), 0)
+        )
+
+    def best_value(self, budget) -> int:
+        """Returns the best achievable total value for `budget` in O(1)."""
+        budget = max(int(budget or 0), 0)
+        return int(self.floor[min(budget, self.capacity)])
+
+    def best_values(self) -> NDArray[np.int64]:
+        """Returns the best achievable total value for every budget up to the capacity."""
+        return self.floor
+
+    def solve(self, budget) -> dict:
+        """
+        Returns the optimal solution for `budget` in the format of `optimize`,
+        in time proportional to the number of item chunks.
+        """
+        budget = max(int(budget or 0), 0)
+        total_value = self.best_value(budget)
+
+        solution = [0] * self.size
+        value = total_value
+        # The table is exact, so the answer is always optimal
+        for i, k, weight, packed in reversed(self.chunks):
+            # Flags of chunks added before the table grew stop at the old capacity
+            if (
+                value >= weight
+                and value - weight < len(packed) * 8
+                and _packed_bit(packed, value - weight)
+            ):
+                solution[i] += k
+                value -= weight
+
+        return solution_outputs(solution, budget, self.prices)
+
+
+def optimize_dp(budget, strategy, stocks, sold_prices):
+    """
+    Calculate the optimal solution of item sales based on the given budget
+    and inventory constraints, using a dynamic program over budget values.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+
+    Returns:
+        - dict: A dictionary containing the solution, total price, total count,
+    """
+    return BudgetFrontier(strategy, stocks, sold_prices, max_budget=budget).solve(
+        budget
+    )
+
+
+# Latency budget of one `k_best_solutions` call: past it, the plans found so
+# far are returned. The first plan is always completed.
+ALTERNATIVES_TIME_LIMIT = float(
+    os.environ.get("ARITHMANCY_ALTERNATIVES_TIME_LIMIT", "2")
+)
+
+
+def _group_splits(total, caps):
+    """
+    Yields every split of `total` units over items holding `caps` units,
+    earlier items filled first, so the split of `postsolve` comes first.
+    """
+    if len(caps) == 1:
+        if total <= caps[0]:
+            yield (total,)
+        return
+    rest = sum(caps[1:])
+    for first in range(min(total, caps[0]), max(total - rest, 0) - 1, -1):
+        for split in _group_splits(total - first, caps[1:]):
+            yield (first,) + split
+
+
+def _support_splits(total, caps):
+    """
+    Yields one split of `total` units over items holding `caps` units per set
+    of items it can sell, `postsolve`'s first: one unit to each item of the
+    set, then the rest filling earlier items first. Every branch of the walk
+    over the sets leads to one, so each set costs one step per item.
+    """
+    first = next(_group_splits(total, caps))
+    yield first
+    tails = list(itertools.accumulate(reversed(caps)))[::-1] + [0]
+
+    def walk(i, members, held):
+        if i == len(caps):
+            split, rest = [0] * len(caps), total - len(members)
+            for m in members:
+                split[m] = 1 + min(caps[m] - 1, rest)
+                rest -= split[m] - 1
+            if tuple(split) != first:
+                yield tuple(split)
+            return
+        # Selling item i: one more unit is due, caps[i] more can be held
+        if len(members) < total:
+            yield from walk(i + 1, members + [i], held + caps[i])
+        # Skipping it: the later items must still hold the total
+        if held + tails[i + 1] >= total:
+            yield from walk(i + 1, members, held)
+
+    yield from walk(0, [], 0)
+
+
+def _member_splits(counts, presolved, stocks, distinct_items=False):
+    """
+    Yields, as per-item counts, every way to split the aggregate `counts` of
+    a presolved problem across the items of each group within `stocks`,
+    starting with the split of `postsolve`. With `distinct_items`, only one
+    split per set of items sold.
+    """
+    parts = [
+        (group, int(count))
+        for group, count in zip(presolved["groups"], counts)
+        if count
+    ]
+    splits = _support_splits if distinct_items else _group_splits
+    solution = np.zeros(len(stocks), dtype=np.int64)
+
+    def expand(p):
+        if p == len(parts):
+            yield solution.copy()
+            return
+        group, count = parts[p]
+        for split in splits(count, stocks[group].tolist()):
+            solution[group] = split
+            yield from expand(p + 1)
+
+    return expand(0)
+
+
+def k_best_solutions(
+    budget,
+    strategy,
+    stocks,
+    sold_prices,
+    k=3,
+    min_distance=1,
+    distinct_items=False,
+    keep_items=(),
+    sell_items=(),
+    max_candidates=None,
+    max_steps=None,
+    time_limit=None,
+) -> list[dict]:
+    """
+    Enumerate up to `k` distinct solutions, best first: by total value, then
+    by item count under `strategy`.
+
+    A single pass builds, for every prefix of the sellable items, the best
+    item count reaching each exact total value. A best-first search then
+    walks these tables backwards, one item per step; the tables give the
+    exact best completion of every partial plan, so plans come out in rank
+    order and each one costs about one step per item. Partial plans of equal
+    rank are continued deepest first, so ties reach a complete plan before
+    the search widens.
+
+    Items sharing a sold price are merged as in `presolve` for the search,
+    and each plan found is then split back across those items in every way
+    their stocks allow, `postsolve`'s split first; the splits share the
+    plan's rank. `keep_items` and `sell_items` restrict every plan rather
+    than filter the plans found: kept items are dropped from the inventory,
+    and one unit of each item to sell is sold before the search.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+        - k (int): The number of plans to return.
+        - min_distance (int): Minimum number of units by which every returned plan differs from the others.
+        - distinct_items (bool): Whether every returned plan must sell a different set of items.
+        - keep_items (list[int]): Indices of items no plan may sell.
+        - sell_items (list[int]): Indices of items every plan must sell.
+        - max_candidates (int): Bound on the plans enumerated before the filters, 50 * k by default.
+        - max_steps (int): Bound on the partial plans expanded, 20000 * k by default.
+        - time_limit (float): Seconds to search once a plan is found, `ALTERNATIVES_TIME_LIMIT` by default.
+
+    Returns:
+        - list[dict]: Solutions in the format of `optimize`, best first. Plans
+    matching the best value and count are marked optimal; the gap of the
+    others is measured against the best value. With `keep_items` or
+    `sell_items`, the best plan is the best one meeting them. Fewer than `k`
+    plans come back when the search runs out of plans, steps or time, and
+    none when no plan can meet `keep_items` and `sell_items`.
+    """
+    budget = max(int(budget or 0), 0)
+    stocks = np.array(stocks, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    sign = 1 if strategy == "MinimizeStock" else -1
+    max_candidates = max_candidates or 50 * k
+    max_steps = max_steps or 20000 * k
+    time_limit = ALTERNATIVES_TIME_LIMIT if time_limit is None else time_limit
+
+    stocks[list(keep_items)] = 0
+    required = np.zeros(len(stocks), dtype=np.int64)
+    required[list(sell_items)] = 1
+    search_budget = budget - int(required @ sold_prices)
+    if search_budget < 0 or np.any(required > (stocks > 0) & (sold_prices > 0)):
+        return []
+    stocks -= required
+
+    presolved = presolve(stocks, sold_prices)
+    usable = np.minimum(presolved["stocks"], search_budget // presolved["prices"])
+    items = np.flatnonzero(usable > 0)
+    usable, prices = usable[items], presolved["prices"][items]
+    capacity = min(search_budget, int(usable @ prices))
+    # layers[j][v]: best signed item count reaching exactly v with the first j items
+    unreachable = np.iinfo(np.int32).min // 2
+    layer = np.full(capacity + 1, unreachable, dtype=np.int32)
+    layer[0] = 0
+    layers = [layer]
+    for price, stock in zip(prices.tolist(), usable.tolist()):
+        layer = layer.copy()
+        for chunk in _split_stock(stock):
+            weight = chunk * price
+            candidate = layer[:-weight] + sign * chunk
+            better = (candidate > layer[weight:]) & (layer[:-weight] > unreachable)
+            layer[weight:][better] = candidate[better]
+        layers.append(layer)
+
+    # A group holds the ranked ways to continue one partial plan:
+    # (layer, total value, signed count so far, chosen counts, remaining
+    # values, scores, counts of the item decided). The root group ranks the
+    # reachable total values themselves.
+    heap = []
+    order = itertools.count()
+
+    def push(group, index):
+        total = group[1] if group[1] is not None else int(group[4][index])
+        # Ties go to the deepest, then the latest partial plan
+        key = (-total, -int(group[5][index]), group[0], -next(order))
+        heapq.heappush(heap, key + (group, index))
+
+    values = np.flatnonzero(layers[-1] > unreachable)[::-1]
+    push((len(items), None, 0, None, values, layers[-1][values], None), 0)
+
+    plans = []
+    candidates = steps = 0
+    deadline = time.perf_counter() + time_limit
+    while heap and len(plans) < k and candidates < max_candidates:
+        if plans and (steps >= max_steps or time.perf_counter() > deadline):
+            break
+        steps += 1
+        *_, group, index = heapq.heappop(heap)
+        # Siblings are ranked, so only the next one can be the next best
+        if index + 1 < len(group[4]):
+            push(group, index + 1)
+
+        j, total, count, chosen, remaining = group[:5]
+        if total is None:
+            total = int(remaining[index])
+        else:
+            taken = int(group[6][index])
+            count += sign * taken
+            if taken:
+                chosen = (chosen, items[j], taken)
+        value = int(remaining[index])
+
+        if value == 0 or j == 0:
+            merged = np.zeros(len(presolved["prices"]), dtype=np.int64)
+            while chosen is not None:
+                chosen, i, taken = chosen
+                merged[i] = taken
+            for solution in _member_splits(merged, presolved, stocks, distinct_items):
+                if (
+                    len(plans) >= k
+                    or candidates >= max_candidates
+                    or (plans and time.perf_counter() > deadline)
+                ):
+                    break
+                candidates += 1
+                solution += required
+                sold = frozenset(np.flatnonzero(solution).tolist())
+                if all(
+                    np.abs(solution - other).sum() >= min_distance
+                    and not (distinct_items and sold == other_sold)
+                    for other, other_sold in plans
+                ):
+                    plans.append((solution, sold))
+            continue
+
+        # Decide item j - 1: every count that leaves a reachable value
+        price = int(prices[j - 1])
+        taken = np.arange(min(int(usable[j - 1]), value // price) + 1)
+        rest = value - taken * price
+        best = layers[j - 1][rest]
+        valid = best > unreachable
+        taken, rest = taken[valid], rest[valid]
+        scores = count + sign * taken + best[valid]
+        ranked = np.argsort(-scores, kind="stable")
+        push(
+            (j - 1, total, count, chosen, rest[ranked], scores[ranked], taken[ranked]),
+            0,
+        )
+
+    outputs = [solution_outputs(solution, budget, sold_prices) for solution, _ in plans]
+    if outputs:
+        best = (outputs[0]["total_price"], outputs[0]["total_count"])
+        for plan in outputs:
+            plan["optimal"] = (plan["total_price"], plan["total_count"]) == best
+            plan["bound"] = best[0]
+            plan["gap"] = (best[0] - plan["total_price"]) / best[0] if best[0] else 0.0
+    return outputs
+
+
+# Prime modulus of the value counts of `sensitivity`. Residues stay below
+# 2**43, so summing 2**20 of them (budgets of about a million) fits an int64.
+_COUNT_MODULUS = 2**43 - 57
+
+
+def _times_one_minus(counts, shift):
+    """Multiplies the generating function `counts` by 1 - x**shift."""
+    result = counts.copy()
+    if shift < len(counts):
+        result[shift:] -= counts[:-shift]
+        result[shift:] %= _COUNT_MODULUS
+    return result
+
+
+def _over_one_minus(counts, shift):
+    """Divides the generating function `counts` by 1 - x**shift."""
+    if shift >= len(counts):
+        return counts.copy()
+    # Running sums along each residue class of `shift`
+    padded = np.concatenate([counts, np.zeros(-len(counts) % shift, dtype=np.int64)])
+    return (np.cumsum(padded.reshape(-1, shift), axis=0) % _COUNT_MODULUS).ravel()[
+        : len(counts)
+    ]
+
+
+def _best_reachable(counts, budget) -> int:
+    """Returns the largest value up to `budget` reached by a nonzero count."""
+    return int(np.flatnonzero(counts[: budget + 1])[-1])
+
+
+def sensitivity(budget, stocks, sold_prices, solution=None) -> dict:
+    """
+    How the best total value responds to the inventory and the budget,
+    from one table shared by every item.
+
+    The table counts, for each value up to the budget plus the highest
+    price, the ways the inventory reaches it, modulo a large prime: the
+    generating function of the product over items of 1 + x**p + ... +
+    x**(s*p). One more or one less unit of an item only changes its own
+    factor, so each answer is that table multiplied and divided by two
+    binomials, in time linear in the budget, instead of a new solve. Items
+    sharing a price share their answer. A count that is a multiple of the
+    prime reads as unreachable, with a chance of about 1e-13 per value.
+    Nothing gains when the best value fills the budget, and, given an
+    optimal `solution`, prices it leaves unsold lose nothing either, so
+    those answers skip the table.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+        - solution (list[int]): An optimal solution for the budget, if known.
+
+    Returns:
+        - dict: The indices of the stocked, priced "items"; per item, the
+    best total value "gain" from one more unit and "loss" from one less
+    (0 for the others); the smallest reachable total value above the best
+    one, "next_value", and the extra budget it takes, "budget_slack" (both
+    None when nothing is left to sell).
+    """
+    budget = max(int(budget or 0), 0)
+    stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    presolved = presolve(stocks, sold_prices)
+    prices, merged = presolved["prices"].tolist(), presolved["stocks"].tolist()
+
+    counts = np.zeros(budget + max(prices, default=0) + 1, dtype=np.int64)
+    counts[0] = 1
+    for price, stock in zip(prices, merged):
+        counts = _over_one_minus(_times_one_minus(counts, (stock + 1) * price), price)
+    best = _best_reachable(counts, budget)
+
+    gain = [0] * len(stocks)
+    loss = [0] * len(stocks)
+    for group, price, stock in zip(presolved["groups"], prices, merged):
+        more = less = best
+        full = solution is None or sum(solution[i] for i in group) >= stock
+        if best < budget or full:
+            # The table without this price's factor, over 1 - x**price
+            rest = _over_one_minus(counts, (stock + 1) * price)
+            if best < budget:
+                more = _best_reachable(
+                    _times_one_minus(rest, (stock + 2) * price), budget
+                )
+            if full:
+                less = _best_reachable(_times_one_minus(rest, stock * price), budget)
+        for i in group:
+            gain[i], loss[i] = more - best, best - less
+
+    above = np.flatnonzero(counts[best + 1 :])
+    next_value = best + 1 + int(above[0]) if len(above) else None
+    return {
+        "items": [int(i) for group in presolved["groups"] for i in sorted(group)],
+        "gain": gain,
+        "loss": loss,
+        "next_value": next_value,
+        "budget_slack": None if next_value is None else next_value - budget,
+    }
+
+
+def _greedy_fill(target, order, stocks, sold_prices):
+    """Takes as many units as fit `target` from each item in `order`, returning the counts."""
+    solution = np.zeros(len(stocks), dtype=np.int64)
+    remaining = target
+    # Plain ints: NumPy scalar arithmetic dominates this loop otherwise
+    for i, stock, price in zip(
+        order.tolist(), stocks[order].tolist(), sold_prices[order].tolist()
+    ):
+        count = min(stock, remaining // price)
+        solution[i] = count
+        remaining -= count * price
+        if remaining == 0:
+            break
+    return solution, remaining
+
+
+def fast_path(budget, strategy, stocks, sold_prices):
+    """
+    Recognizes requests that need no search and answers them directly.
+
+    Returns `(path, outputs)`, or `(None, None)` when the request needs a
+    backend. The paths are:
+        - zero_budget: nothing can be sold.
+        - sell_all: the whole inventory fits the budget.
+        - single_price: every sellable item has the same price, so the value
+          fixes the count.
+        - exact_greedy: every value is a multiple of the price gcd, so the
+          largest such multiple within the budget bounds the value. A greedy
+          fill (cheapest first for MinimizeStock, dearest first for
+          MaximizeStock) that reaches it with the count of the fractional
+          fill, which bounds the count, is optimal under the tie-break.
+    """
+    budget = int(budget or 0)
+    stocks = np.asarray(stocks, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    sellable = np.flatnonzero((stocks > 0) & (sold_prices > 0))
+    prices = sold_prices[sellable]
+
+    if budget <= 0 or len(sellable) == 0:
+        return "zero_budget", solution_outputs([0] * len(stocks), budget, sold_prices)
+    total_value = int(stocks[sellable] @ prices)
+    if total_value <= budget:
+        return "sell_all", solution_outputs(stocks, budget, sold_prices)
+
+    if prices.min() == prices.max():
+        solution, _ = _greedy_fill(budget, sellable, stocks, sold_prices)
+        return "single_price", solution_outputs(solution, budget, sold_prices)
+
+    gcd = int(np.gcd.reduce(prices))
+    target = budget - budget % gcd
+    # Stable sort keeps catalog order among equal prices
+    ranked = np.argsort(
+        prices if strategy == "MinimizeStock" else -prices, kind="stable"
+    )
+    order = sellable[ranked]
+    solution, remaining = _greedy_fill(target, order, stocks, sold_prices)
+    if remaining == 0:
+        # Fractional fill of `target` in the same order: its count bounds
+        # every integer solution of that value
+        values = np.cumsum(stocks[order] * sold_prices[order])
+        last = int(np.searchsorted(values, target))
+        before = int(values[last - 1]) if last else 0
+        whole, rest = divmod(target - before, int(sold_prices[order[last]]))
+        bound = int(stocks[order[:last]].sum()) + whole
+        if strategy != "MinimizeStock" and rest:
+            bound += 1
+        if solution.sum() == bound:
+            return "exact_greedy", solution_outputs(solution, budget, sold_prices)
+    return None, None
+
+
+SOLVER_BACKENDS = {
+    "scip": optimize_scip,
+    "scip_lexicographic": optimize_scip_lexicographic,
+    "scip_template": optimize_scip_template,
+    "dp": optimize_dp,
+}
+
+DEFAULT_BACKEND = os.environ.get("ARITHMANCY_SOLVER_BACKEND", "dp")
+# Set ARITHMANCY_INCREMENTAL=1 to keep per-session solver state in the UI.
+# Off by default: those solves run in the server process, outside the worker
+# pool and its timeout, and each session holds a full-budget table.
+INCREMENTAL_SOLVES = os.environ.get("ARITHMANCY_INCREMENTAL", "0") == "1"
+
+
+def presolve(stocks, sold_prices) -> dict:
+    """
+    Reduce the problem before it reaches a backend.
+
+    Items without stock or price cannot change the answer and are dropped.
+    Items sharing a sold price are interchangeable for both value and item
+    count, so they collapse into one aggregate item with their summed stock.
+
+    Returns:
+        - dict: The reduced "stocks" and "prices", the original item indices
+          of each aggregate in "groups", and the presolve "stats".
+    """
+    stocks = np.asarray(stocks, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+
+    kept = np.flatnonzero((stocks > 0) & (sold_prices > 0))
+    prices, inverse = np.unique(sold_prices[kept], return_inverse=True)
+    reduced_stocks = np.bincount(inverse, weights=stocks[kept], minlength=len(prices))
+    groups = [kept[inverse == g] for g in range(len(prices))]
+
+    return {
+        "stocks": reduced_stocks.astype(np.int64),
+        "prices": prices,
+        "groups": groups,
+        "stats": {
+            "items": len(stocks),
+            "dropped": len(stocks) - len(kept),
+            "merged": len(kept) - len(prices),
+            "reduced_items": len(prices),
+        },
+    }
+
+
+# Seconds per DP cell (budget value times stock chunk), measured on the dp backend
+_SECONDS_PER_CELL = 1.3e-9
+
+
+def estimate_cost(budget, stocks, sold_prices) -> float:
+    """
+    Estimated solve time in seconds, from the size of the problem left once
+    zero-stock items are dropped and equal prices merged as in `presolve`:
+    reachable budget values times the number of binary stock chunks.
+    """
+    stocks = np.asarray(stocks, dtype=np.int64)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    kept = (stocks > 0) & (sold_prices > 0)
+    prices, inverse = np.unique(sold_prices[kept], return_inverse=True)
+    merged = np.bincount(inverse, weights=stocks[kept], minlength=len(prices))
+    capacity = min(max(int(budget or 0), 0), int(merged @ prices))
+    chunks = int(np.ceil(np.log2(merged + 1)).sum())
+    return capacity * chunks * _SECONDS_PER_CELL
+
+
+def scheduled(optimize_fn):
+    """
+    Wraps `optimize_fn` to wait for a `SCHEDULER` slot, where problems with a
+    smaller `estimate_cost` start first.
+    """
+
+    def run(budget, strategy, stocks, sold_prices, **kwargs):
+        return SCHEDULER.run(
+            estimate_cost(budget, stocks, sold_prices),
+            partial(optimize_fn, **kwargs),
+            budget,
+            strategy,
+            stocks,
+            sold_prices,
+        )
+
+    return run
+
+
+def postsolve(outputs, presolved, stocks) -> dict:
+    """
+    Map the outputs of a presolved problem back onto the original items.
+
+    Aggregate counts are split across their items in catalog order, filling
+    each item up to its stock before moving to the next one.
+    """
+    solution = [0] * len(stocks)
+    for group, count in zip(presolved["groups"], outputs["solution"]):
+        for i in group:
+            if count <= 0:
+                break
+            solution[i] = min(int(stocks[i]), count)
+            count -= solution[i]
+
+    return dict(outputs, solution=solution, presolve=presolved["stats"])
+
+
+def optimize(
+    budget,
+    strategy,
+    stocks,
+    sold_prices,
+    backend=None,
+    reduce=True,
+    fast_paths=True,
+    report=False,
+):
+    """
+    Calculate the optimal solution of item sales with the selected backend.
+
+    Args:
+        - budget (int): The total budget available for purchasing items.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+        - backend (str): One of `SOLVER_BACKENDS`, defaults to `DEFAULT_BACKEND`.
+        - reduce (bool): Whether to run `presolve` before the backend.
+        - fast_paths (bool): Whether to answer trivial requests with `fast_path`.
+        - report (bool): Whether to add the `sensitivity` report of the solution.
+
+    Returns:
+        - dict: A dictionary containing the solution, total price, total count,
+    and, with `report`, "sensitivity".
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend: {backend}")
+
+    outputs = _optimize(
+        budget, strategy, stocks, sold_prices, backend, reduce, fast_paths
+    )
+    if report:
+        with metrics.timed("sensitivity"):
+            outputs = dict(
+                outputs,
+                sensitivity=sensitivity(
+                    budget, stocks, sold_prices, outputs["solution"]
+                ),
+            )
+    return outputs
+
+
+def _optimize(budget, strategy, stocks, sold_prices, backend, reduce, fast_paths):
+    try:
+        with metrics.timed("solve"):
+            if fast_paths:
+                path, outputs = fast_path(budget, strategy, stocks, sold_prices)
+                metrics.increment("fast_paths", path=path or "none")
+                if path is not None:
+                    return outputs
+            if not reduce:
+                outputs = SOLVER_BACKENDS[backend](
+                    budget, strategy, stocks, sold_prices
+                )
+            else:
+                presolved = presolve(stocks, sold_prices)
+                outputs = postsolve(
+                    SOLVER_BACKENDS[backend](
+                        budget, strategy, presolved["stocks"], presolved["prices"]
+                    ),
+                    presolved,
+                    stocks,
+                )
+    except Exception:
+        metrics.increment("solves", backend=backend, status="failed")
+        raise
+    metrics.increment(
+        "solves",
+        backend=backend,
+        status="ok" if outputs.get("optimal", True) else "approximate",
+    )
+    return outputs
+
+
+# Latency budget of one `plan_days` call: past it, the best plan found so far
+# is returned with its optimality gap. The first plan is always completed.
+PLAN_TIME_LIMIT = float(os.environ.get("ARITHMANCY_PLAN_TIME_LIMIT", "0.5"))
+# Each day is solved exactly over this many times its dearest live price once
+# bulk-filled below that (see `_plan_day`)
+PLAN_WINDOW_PRICES = 4
+# Rounds of pairwise re-optimization in `_repair_days`
+PLAN_REPAIR_ROUNDS = 2
+# Largest estimated solve time (seconds) spent on the reachable-value bound of a plan
+PLAN_BOUND_SECONDS = 0.1
+
+
+def _plan_day(budget, strategy, stocks, sold_prices) -> NDArray[np.int64]:
+    """
+    Sells for one day of `plan_days`: the `fast_path` answer when there is
+    one, otherwise a greedy fill (cheapest first for MinimizeStock, dearest
+    first for MaximizeStock) stopped a few prices short of the budget and an
+    exact dynamic program over the rest.
+    """
+    path, outputs = fast_path(budget, strategy, stocks, sold_prices)
+    if path is not None:
+        return np.asarray(outputs["solution"], dtype=np.int64)
+
+    sellable = np.flatnonzero((stocks > 0) & (sold_prices > 0))
+    prices = sold_prices[sellable]
+    window = min(budget, PLAN_WINDOW_PRICES * int(prices.max()))
+    order = sellable[
+        np.argsort(prices if strategy == "MinimizeStock" else -prices, kind="stable")
+    ]
+    bulk, _ = _greedy_fill(budget - window, order, stocks, sold_prices)
+    rest = stocks - bulk
+    presolved = presolve(rest, sold_prices)
+    outputs = postsolve(
+        optimize_dp(
+            budget - int(bulk @ sold_prices),
+            strategy,
+            presolved["stocks"],
+            presolved["prices"],
+        ),
+        presolved,
+        rest,
+    )
+    return bulk + np.asarray(outputs["solution"], dtype=np.int64)
+
+
+def _repair_days(budgets, days, unsold, day_bounds, bound, sold_prices, deadline):
+    """
+    Re-solves pairs of days of a plan jointly, over their items and the
+    unsold stock, while a day short of its own best value gains from it.
+    Updates `days` in place and returns the new unsold stock and the set of
+    days that changed.
+    """
+    values = [int(day @ sold_prices) for day in days]
+    changed = set()
+    for _ in range(PLAN_REPAIR_ROUNDS):
+        improved = False
+        short = [d for d in range(len(days)) if values[d] < day_bounds[d]]
+        for a in sorted(short, key=lambda d: values[d] - budgets[d]):
+            # Days with the most spare budget can take items off this one first
+            for b in sorted(range(len(days)), key=lambda b: values[b] - budgets[b]):
+                if values[a] >= day_bounds[a] or sum(values) >= bound:
+                    break
+                if b == a or time.perf_counter() > deadline:
+                    continue
+                pool = unsold + days[a] + days[b]
+                sold = _plan_day(budgets[a], "MaximizeStock", pool, sold_prices)
+                other = _plan_day(budgets[b], "MaximizeStock", pool - sold, sold_prices)
+                if int((sold + other) @ sold_prices) > values[a] + values[b]:
+                    days[a], days[b] = sold, other
+                    values[a] = int(sold @ sold_prices)
+                    values[b] = int(other @ sold_prices)
+                    unsold = pool - sold - other
+                    changed.update((a, b))
+                    improved = True
+        if not improved:
+            break
+    return unsold, changed
+
+
+def plan_days(budgets, strategy, stocks, sold_prices, time_limit=None) -> dict:
+    """
+    Plans the sales of one inventory over several days, each with its own
+    budget cap, maximizing the total value and then, under `strategy`, the
+    total item count.
+
+    The first plan solves the days one after another with `strategy`, as
+    selling day by day would. Until a plan reaches the bound below or the
+    time limit passes, further plans fill the days in other orders (largest
+    or smallest budget first), each with as few or as many items as its
+    value allows; the fewest items leave the small, flexible ones to the
+    days after it. In every plan, pairs of days below their own best value
+    are then re-solved jointly (`_repair_days`). The days of the best plan
+    not solved with `strategy` last finally apply its tie-break to their
+    items and the unsold stock.
+
+    The plan is not guaranteed optimal: its total is compared against an
+    upper bound taken from the reachable values of the inventory (the best
+    value of each day on its own, and of all budgets together) when that
+    table is cheap enough, or from the price gcd otherwise.
+
+    Args:
+        - budgets (list[int]): The budget of each day.
+        - strategy (str): The strategy to use for optimization, either "MinimizeStock" or "MaximizeStock".
+        - stocks (NDArray[int]): An array representing the available stock of each item.
+        - sold_prices (NDArray[int]): An array representing the selling price of each item.
+        - time_limit (float): Seconds to search for better plans, `PLAN_TIME_LIMIT` by default.
+
+    Returns:
+        - dict: The totals in the format of `optimize` (over the summed
+    budget, with the optimality `gap` and `bound`) and, under "days", the
+    solution, total price, total count and remaining budget of each day.
+    """
+    deadline = time.perf_counter() + (
+        PLAN_TIME_LIMIT if time_limit is None else time_limit
+    )
+    budgets = [max(int(budget or 0), 0) for budget in budgets]
+    stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+    sold_prices = np.asarray(sold_prices, dtype=np.int64)
+    sign = 1 if strategy == "MinimizeStock" else -1
+
+    # Upper bounds on the value of each day and of the whole plan
+    sellable = (stocks > 0) & (sold_prices > 0)
+    inventory_value = int(stocks[sellable] @ sold_prices[sellable])
+    gcd = int(np.gcd.reduce(sold_prices[sellable])) if sellable.any() else 1
+    day_bounds = [budget - budget % gcd for budget in budgets]
+    bound = min(sum(day_bounds), inventory_value - inventory_value % gcd)
+    capacity = min(sum(budgets), inventory_value)
+    if estimate_cost(capacity, stocks, sold_prices) <= PLAN_BOUND_SECONDS:
+        frontier = BudgetFrontier(strategy, stocks, sold_prices, max_budget=capacity)
+        day_bounds = [frontier.best_value(budget) for budget in budgets]
+        bound = min(sum(day_bounds), frontier.best_value(capacity))
+
+    def score(days):
+        total = sum(days, np.zeros(len(stocks), dtype=np.int64))
+        return int(total @ sold_prices), sign * int(total.sum())
+
+    given = list(range(len(budgets)))
+    largest = sorted(given, key=lambda d: -budgets[d])
+    smallest = largest[::-1]
+    other = "MaximizeStock" if strategy == "MinimizeStock" else "MinimizeStock"
+    best = None
+    for order, day_strategy in (
+        (given, strategy),
+        (largest, "MaximizeStock"),
+        (smallest, "MaximizeStock"),
+        (largest, "MinimizeStock"),
+        (smallest, "MinimizeStock"),
+        (given, other),
+    ):
+        if best is not None and (
+            score(best[0])[0] >= bound or time.perf_counter() > deadline
+        ):
+            break
+        days = [np.zeros(len(stocks), dtype=np.int64) for _ in budgets]
+        unsold = stocks.copy()
+        for d in order:
+            days[d] = _plan_day(budgets[d], day_strategy, unsold, sold_prices)
+            unsold -= days[d]
+        unsold, changed = _repair_days(
+            budgets, days, unsold, day_bounds, bound, sold_prices, deadline
+        )
+        unsettled = given if day_strategy != strategy else sorted(changed)
+        if best is None or score(days) > score(best[0]):
+            best = days, unsold, unsettled
+
+    # Tie-break: each day in turn may swap items with the unsold stock
+    days, unsold, unsettled = best
+    for d in unsettled:
+        pool = unsold + days[d]
+        sold = _plan_day(budgets[d], strategy, pool, sold_prices)
+        if score([sold]) > score([days[d]]):
+            days[d] = sold
+            unsold = pool - sold
+
+    outputs = solution_outputs(stocks - unsold, sum(budgets), sold_prices, bound=bound)
+    outputs["days"] = [
+        {
+            key: day_outputs[key]
+            for key in ("solution", "total_price", "total_count", "remaining")
+        }
+        for day_outputs in (
+            solution_outputs(solution, budget, sold_prices)
+            for solution, budget in zip(days, budgets)
+        )
+    ]
+    return outputs
+
+
+@lru_cache(maxsize=256)
+def _get_prices(
+    catalog,
+    currency,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+) -> NDArray[np.int32]:
+    base = catalog.base_prices[currency]
+    prices = np.where(
+        catalog.is_plant,
+        base * (1 + plants_prices_extra_rate),
+        # Licet(@discord)'s data shows that all values are rounded down: https://docs.google.com/spreadsheets/d/1CWv0VmgfKKWWlqUty9hqGwWt86_G94x5K89DP4b4eRI
+        np.floor(
+            base * (1 + dishes_prices_extra_rate) * (1 + talent_price_bonus / 100)
+        ),
+    ).astype(np.int32)
+    prices.flags.writeable = False
+    return prices
+
+
+def get_prices(
+    currency,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    catalog=None,
+) -> NDArray[np.int32]:
+    """
+    Returns the selling price of every plant and dish of `catalog` (the
+    current one by default) for the given currency, acquisition rates and
+    talent bonus. Results are memoized per catalog version and read-only.
+    """
+    return _get_prices(
+        catalog or current_catalog(),
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus or 0,
+    )
+
+
+def label_results(outputs, prices, language, currency, catalog=None) -> dict:
+    """
+    Converts solver outputs into the results dictionary expected by
+    `format_results`, keyed by localized item labels of `catalog`.
+    """
+    solution = np.asarray(outputs["solution"])
+    sold = np.flatnonzero(solution > 0)
+    prefixes = (catalog or current_catalog()).item_label_prefixes[language]
+    results = {
+        "solution": {
+            f"{prefixes[i]}{int(prices[i])} {currency})": int(solution[i]) for i in sold
+        },
+        "total_price": outputs["total_price"],
+        "total_count": outputs["total_count"],
+        "remaining": outputs["remaining"],
+        "optimal": outputs.get("optimal", True),
+        "gap": outputs.get("gap", 0.0),
+        "bound": outputs.get("bound", outputs["total_price"]),
+    }
+    if "sensitivity" in outputs:
+        report = outputs["sensitivity"]
+        results["sensitivity"] = dict(
+            report,
+            items={
+                f"{prefixes[i]}{int(prices[i])} {currency})": (
+                    report["gain"][i],
+                    report["loss"][i],
+                )
+                for i in report["items"]
+            },
+        )
+    return results
+
+
+def _results_stream(
+    language,
+    currency,
+    budget,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    *inventory,
+    optimize_fn=None,
+    preliminary=True,
+):
+    # The whole request runs on the version it started with
+    catalog = current_catalog()
+    with metrics.timed("prices"):
+        prices = get_prices(
+            currency,
+            plants_prices_extra_rate,
+            dishes_prices_extra_rate,
+            talent_price_bonus,
+            catalog=catalog,
+        )
+    stocks = catalog.stocks_from(inventory, UI_CATALOG)
+    key = solution_key(budget, strategy, stocks, prices)
+    outputs = SOLUTION_CACHE.get(key, version=catalog.version)
+    if outputs is not None and "sensitivity" not in outputs:
+        # Cached by a caller that skipped the report, e.g. `solve_batch`
+        outputs = None
+    metrics.increment("cache_lookups", result="miss" if outputs is None else "hit")
+
+    from ui.display import format_results
+
+    if outputs is None and preliminary:
+        path, preliminary_outputs = fast_path(budget, strategy, stocks, prices)
+        if path is not None:
+            # Exact already; the sensitivity report follows with the solve
+            metrics.increment("fast_paths", path=path)
+            final = True
+        else:
+            preliminary_outputs = greedy_solution(budget, strategy, stocks, prices)
+            final = False
+        with metrics.timed("format"):
+            yield format_results(
+                label_results(
+                    preliminary_outputs, prices, language, currency, catalog=catalog
+                ),
+                language,
+                final=final,
+            )
+    if outputs is None:
+        # Identical requests arriving while this one solves share its answer.
+        # The report is computed with the solve, in the worker when there is
+        # one, and cached with it.
+        outputs = IN_FLIGHT.run(
+            f"{catalog.version}:{key}",
+            partial(optimize_fn or optimize, report=True),
+            budget,
+            strategy,
+            stocks,
+            prices,
+        )
+        SOLUTION_CACHE.put(key, outputs, version=catalog.version)
+
+    with metrics.timed("format"):
+        yield format_results(
+            label_results(outputs, prices, language, currency, catalog=catalog),
+            language,
+        )
+
+
+def get_results(
+    language,
+    currency,
+    budget,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    *inventory,
+    optimize_fn=None,
+):
+    """
+    Solve one request from the Gradio inputs and format the results.
+
+    `optimize_fn` replaces `optimize` for cache misses, e.g. to run the
+    solve in a worker process.
+    """
+    return next(
+        _results_stream(
+            language,
+            currency,
+            budget,
+            plants_prices_extra_rate,
+            dishes_prices_extra_rate,
+            talent_price_bonus,
+            strategy,
+            *inventory,
+            optimize_fn=optimize_fn,
+            preliminary=False,
+        )
+    )
+
+
+def get_results_stream(*args, optimize_fn=None):
+    """
+    Streaming variant of `get_results` for Gradio generator callbacks.
+
+    Unless the answer is cached or trivial, first yields the greedy answer
+    with its optimality gap, within milliseconds, then the final answer once
+    the solve returns. Concurrent identical requests share one solve.
+    """
+    yield from _results_stream(*args, optimize_fn=optimize_fn)
+
+
+class IncrementalSolver:
+    """
+    Per-session solver state for the usual edit loop: solve, change one stock
+    or the budget, solve again.
+
+    The `BudgetFrontier` of the last inventory is kept for every budget up to
+    `MAX_BUDGET`, so a budget change is answered from the table and an added
+    stock only adds that item's chunks. When stock is removed, the previous
+    solution is still optimal if it does not use the removed units and the
+    budget is unchanged; anything else falls back to a full rebuild.
+    """
+
+    def __init__(self):
+        self.frontier = None
+        self.key = None
+        self.last = None  # (key, budget, stocks, outputs) of the previous solve
+
+    def solve(self, budget, strategy, stocks, sold_prices, report=False) -> dict:
+        """Drop-in replacement for `optimize` that reuses the session state."""
+        budget = max(int(budget or 0), 0)
+        stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+        key = (strategy, np.asarray(sold_prices, dtype=np.int64).tobytes())
+
+        with metrics.timed("solve"):
+            outputs, result = self._solve(budget, strategy, stocks, sold_prices, key)
+        metrics.increment("incremental", result=result)
+        self.last = (key, budget, stocks, outputs)
+        if report:
+            with metrics.timed("sensitivity"):
+                outputs = dict(
+                    outputs,
+                    sensitivity=sensitivity(
+                        budget, stocks, sold_prices, outputs["solution"]
+                    ),
+                )
+        return outputs
+
+    def _solve(self, budget, strategy, stocks, sold_prices, key):
+        path, outputs = fast_path(budget, strategy, stocks, sold_prices)
+        metrics.increment("fast_paths", path=path or "none")
+        if path is not None:
+            # The table, if any, still describes its own inventory
+            return outputs, "fast_path"
+        if (
+            self.frontier is not None
+            and self.key == key
+            and budget <= self.frontier.max_budget
+        ):
+            previous_key, previous_budget, previous_stocks, previous = self.last
+            if self.frontier.extend(stocks):
+                return self.frontier.solve(budget), "extended"
+            # The previous answer may come from a fast path on other prices
+            if (
+                previous_key == key
+                and budget == previous_budget
+                and len(stocks) == len(previous_stocks)
+                and np.all(stocks <= previous_stocks)
+                and np.all(np.asarray(previous["solution"]) <= stocks)
+            ):
+                # Only unsold units were removed, so the optimum is unchanged;
+                # the table still describes its own, larger inventory
+                return previous, "reused"
+
+        self.frontier = BudgetFrontier(
+            strategy, stocks, sold_prices, max_budget=max(budget, MAX_BUDGET)
+        )
+        self.key = key
+        return self.frontier.solve(budget), "rebuilt"
+
+
+def get_results_incremental(session, language, *args):
+    """
+    `get_results_stream` backed by the `IncrementalSolver` kept in the Gradio
+    session state, with solves admitted by `SCHEDULER`. Yields the formatted
+    results with the session state.
+    """
+    session = session or IncrementalSolver()
+    optimize_fn = scheduled(session.solve)
+    for text in get_results_stream(language, *args, optimize_fn=optimize_fn):
+        yield text, session
+
+
+def sweep_prices(
+    catalog, currency, plants_rates, dishes_rates, talent_bonuses
+) -> NDArray[np.int32]:
+    """
+    Returns the prices of `get_prices` for every combination of plant rate,
+    dish rate and talent bonus, built in one broadcast pass, with the shape
+    (plant rates, dish rates, talent bonuses, items).
+    """
+    base = catalog.base_prices[currency]
+    plants_rates = np.asarray(plants_rates, dtype=np.int64)[:, None, None, None]
+    dishes_rates = np.asarray(dishes_rates, dtype=np.int64)[None, :, None, None]
+    talent_bonuses = np.asarray(talent_bonuses, dtype=np.float64)[None, None, :, None]
+    # Same operations, in the same order, as `_get_prices`
+    return np.where(
+        catalog.is_plant,
+        base * (1 + plants_rates),
+        np.floor(base * (1 + dishes_rates) * (1 + talent_bonuses / 100)),
+    ).astype(np.int32)
+
+
+def _sweep_frontiers(budget, strategy, stocks, prices):
+    """
+    Builds one `BudgetFrontier` per distinct row of `prices` (one price
+    vector per row) for `stocks`, returning them and the row of each.
+    """
+    vectors, inverse = np.unique(prices, axis=0, return_inverse=True)
+    frontiers = []
+    for vector in vectors:
+        presolved = presolve(stocks, vector)
+        frontiers.append(
+            BudgetFrontier(
+                strategy, presolved["stocks"], presolved["prices"], max_budget=budget
+            )
+        )
+    return frontiers, inverse.ravel()
+
+
+def _combine_frontiers(budget, plants, dishes) -> tuple[int, int]:
+    """
+    Returns the best total value and signed item count within `budget` of
+    two inventories sold together, from their frontiers: the best split of
+    the budget between them, in time linear in the budget.
+    """
+    plant_values = np.flatnonzero(plants.reachable[: budget + 1])
+    dish_budgets = np.minimum(budget - plant_values, dishes.capacity)
+    totals = plant_values + dishes.best_values()[dish_budgets]
+    value = int(totals.max())
+    # Best count over every way of splitting exactly that value
+    split = plant_values[value - plant_values <= dishes.capacity]
+    split = split[dishes.reachable[value - split]]
+    return value, int((plants.best[split] + dishes.best[value - split]).max())
+
+
+def sweep(
+    budget,
+    strategy,
+    stocks,
+    currency,
+    talent_bonuses,
+    plants_rates=RATE_LEVELS,
+    dishes_rates=RATE_LEVELS,
+    catalog=None,
+) -> dict:
+    """
+    Solves one inventory and budget for every combination of plant rate,
+    dish rate and talent bonus.
+
+    Price vectors come from `sweep_prices`. Plant prices only depend on the
+    plant rate and dish prices on the dish rate and talent bonus, so the
+    plants and the dishes of the inventory each get one `BudgetFrontier` per
+    distinct price vector of their stocked items (rounding often makes them
+    equal across bonuses), and every combination is the best split of the
+    budget between one of each, read off the two tables.
+
+    Returns:
+        - dict: The "total_price" and "total_count" of every combination,
+    shaped (plant rates, dish rates, talent bonuses), and the number of
+    grid "points" and of reachable-value tables built, "solves".
+    """
+    catalog = catalog or current_catalog()
+    budget = max(int(budget or 0), 0)
+    stocks = np.maximum(np.asarray(stocks, dtype=np.int64), 0)
+    sign = 1 if strategy == "MinimizeStock" else -1
+    grid = sweep_prices(catalog, currency, plants_rates, dishes_rates, talent_bonuses)
+
+    plant_items = np.flatnonzero((stocks > 0) & catalog.is_plant)
+    dish_items = np.flatnonzero((stocks > 0) & ~catalog.is_plant)
+    plants, plant_rows = _sweep_frontiers(
+        budget, strategy, stocks[plant_items], grid[:, 0, 0][:, plant_items]
+    )
+    dishes, dish_rows = _sweep_frontiers(
+        budget,
+        strategy,
+        stocks[dish_items],
+        grid[0].reshape(-1, grid.shape[-1])[:, dish_items],
+    )
+
+    dish_rows = dish_rows.reshape(grid.shape[1:-1])
+    combined = {}
+    values = np.zeros(grid.shape[:-1], dtype=np.int64)
+    counts = np.zeros(grid.shape[:-1], dtype=np.int64)
+    for index in np.ndindex(*values.shape):
+        pair = (plant_rows[index[0]], dish_rows[index[1:]])
+        if pair not in combined:
+            combined[pair] = _combine_frontiers(
+                budget, plants[pair[0]], dishes[pair[1]]
+            )
+        values[index] = combined[pair][0]
+        counts[index] = sign * combined[pair][1]
+    return {
+        "total_price": values,
+        "total_count": counts,
+        "points": values.size,
+        "solves": len(plants) + len(dishes),
+    }
+
+
+def parse_bonuses(text) -> list[int]:
+    """
+    Reads the talent bonuses typed in the UI: whole percentages separated by
+    commas or spaces, each capped at `MAX_TALENT_BONUS`, at most
+    `MAX_SWEEP_BONUSES`.
+    """
+    bonuses = re.findall(r"\d+", text or "")[:MAX_SWEEP_BONUSES]
+    return sorted({min(int(bonus), MAX_TALENT_BONUS) for bonus in bonuses})
+
+
+def get_sweep_table(language, currency, budget, strategy, talent_bonuses, *inventory):
+    """
+    Compares every blooms and confiserie rate level and each talent bonus
+    typed in `talent_bonuses` for the inventory and budget of the Gradio
+    inputs. Returns a DataFrame with one row per pair of rate levels and one
+    total value column per talent bonus.
+    """
+    catalog = current_catalog()
+    stocks = catalog.stocks_from(inventory, UI_CATALOG)
+    bonuses = parse_bonuses(talent_bonuses) or [0]
+    with metrics.timed("solve"):
+        values = sweep(budget, strategy, stocks, currency, bonuses, catalog=catalog)[
+            "total_price"
+        ]
+
+    import pandas as pd
+
+    labels = catalog.labels[language]["ui"]
+    blooms = labels["blooms_rate"]["options"]
+    confiserie = labels["confiserie_rate"]["options"]
+    return pd.DataFrame(
+        [
+            [f"{blooms[p].split('(')[0]} / {confiserie[d].split('(')[0]}"]
+            + values[i, j].tolist()
+            for i, p in enumerate(RATE_LEVELS)
+            for j, d in enumerate(RATE_LEVELS)
+        ],
+        columns=[labels["sweep"]["rates"]]
+        + [labels["sweep"]["talent"].format(bonus=bonus) for bonus in bonuses],
+    )
+
+
+def get_frontier(
+    currency,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    *inventory,
+):
+    """
+    Builds the `BudgetFrontier` of an inventory, answering every budget up to
+    `MAX_BUDGET` from one computation.
+    """
+    catalog = current_catalog()
+    prices = get_prices(
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus,
+        catalog=catalog,
+    )
+    stocks = catalog.stocks_from(inventory, UI_CATALOG)
+    return BudgetFrontier(strategy, stocks, prices)
+
+
+def get_frontier_plot_data(
+    currency,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    *inventory,
+    points=500,
+):
+    """
+    Returns a DataFrame of the best total value against budget for the Gradio
+    line plot, sampled at `points` budgets up to `MAX_BUDGET`.
+    """
+    frontier = get_frontier(
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus,
+        strategy,
+        *inventory,
+    )
+    budgets = np.unique(np.linspace(0, MAX_BUDGET, points + 1).astype(np.int64))
+    values = frontier.best_values()[np.minimum(budgets, frontier.capacity)]
+
+    import pandas as pd
+
+    return pd.DataFrame({"budget": budgets, "total_value": values})
+
+
+def get_alternatives(
+    language,
+    currency,
+    budget,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    k,
+    min_distance,
+    distinct_items,
+    keep_items,
+    sell_items,
+    *inventory,
+):
+    """
+    Lists the `k` best distinct plans of one request from the Gradio inputs,
+    formatted as `get_results` does, one section per plan. `keep_items` and
+    `sell_items` hold indices of inventory inputs.
+    """
+    catalog = current_catalog()
+    prices = get_prices(
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus,
+        catalog=catalog,
+    )
+    stocks = catalog.stocks_from(inventory, UI_CATALOG)
+    positions = catalog.positions(UI_CATALOG)
+    keep_items, sell_items = (
+        [int(positions[i]) for i in items or () if positions[i] >= 0]
+        for items in (keep_items, sell_items)
+    )
+    with metrics.timed("solve"):
+        plans = k_best_solutions(
+            budget,
+            strategy,
+            stocks,
+            prices,
+            k=min(max(int(k or 1), 1), MAX_ALTERNATIVES),
+            min_distance=max(int(min_distance or 1), 1),
+            distinct_items=bool(distinct_items),
+            keep_items=keep_items,
+            sell_items=sell_items,
+        )
+
+    from ui.display import format_alternatives
+
+    with metrics.timed("format"):
+        return format_alternatives(
+            [
+                label_results(plan, prices, language, currency, catalog=catalog)
+                for plan in plans
+            ],
+            language,
+        )
+
+
+def parse_budgets(text) -> list[int]:
+    """
+    Reads the daily budgets typed in the UI: whole numbers separated by
+    commas or spaces, each capped at `MAX_BUDGET`, at most `MAX_PLAN_DAYS`.
+    """
+    budgets = re.findall(r"\d+", text or "")[:MAX_PLAN_DAYS]
+    return [min(int(budget), MAX_BUDGET) for budget in budgets]
+
+
+def get_day_plan(
+    language,
+    currency,
+    daily_budgets,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    strategy,
+    *inventory,
+):
+    """
+    Plans the sales of one inventory over several days from the Gradio
+    inputs, `daily_budgets` being the text read by `parse_budgets`, and
+    formats the plan one section per day.
+    """
+    catalog = current_catalog()
+    prices = get_prices(
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus,
+        catalog=catalog,
+    )
+    stocks = catalog.stocks_from(inventory, UI_CATALOG)
+    with metrics.timed("solve"):
+        plan = plan_days(parse_budgets(daily_budgets), strategy, stocks, prices)
+
+    from ui.display import format_day_plan
+
+    with metrics.timed("format"):
+        return format_day_plan(
+            label_results(plan, prices, language, currency, catalog=catalog),
+            [
+                label_results(day, prices, language, currency, catalog=catalog)
+                for day in plan["days"]
+            ],
+            language,
+        )
+
+
+def inventory_to_stocks(inventory, catalog=None) -> NDArray[np.int32]:
+    """
+    Converts an inventory given as counts in catalog order or as a
+    {(name, tier): count} mapping into a stock vector of `catalog`.
+    """
+    if isinstance(inventory, dict):
+        catalog = catalog or current_catalog()
+        stocks = np.zeros(catalog.size, dtype=np.int32)
+        for key, n in inventory.items():
+            if tuple(key) not in catalog.item_index:
+                raise ValueError(f"Unknown item: {key}")
+            stocks[catalog.item_index[tuple(key)]] = n or 0
+        return stocks
+    return np.array([n if n else 0 for n in inventory], dtype=np.int32)
+
+
+def item_indices(keys, catalog=None) -> list[int]:
+    """
+    Converts (name, tier) keys into item indices of `catalog`, raising
+    `ValueError` for an unknown item.
+    """
+    catalog = catalog or current_catalog()
+    for key in keys:
+        if tuple(key) not in catalog.item_index:
+            raise ValueError(f"Unknown item: {key}")
+    return [catalog.item_index[tuple(key)] for key in keys]
+
+
+def structure_results(outputs, prices, budget, strategy, catalog=None) -> dict:
+    """
+    Converts solver outputs into a plain dict with the sold items keyed by
+    name and tier of `catalog`, as returned by `solve_batch`.
+    """
+    item_keys = (catalog or current_catalog()).item_keys
+    return {
+        "budget": int(budget or 0),
+        "strategy": strategy,
+        "items": [
+            {
+                "name": item_keys[i][0],
+                "tier": item_keys[i][1],
+                "price": int(prices[i]),
+                "count": int(n),
+            }
+            for i, n in enumerate(outputs["solution"])
+            if n > 0
+        ],
+        "total_price": outputs["total_price"],
+        "total_count": outputs["total_count"],
+        "remaining": outputs["remaining"],
+        "optimal": outputs.get("optimal", True),
+        "gap": outputs.get("gap", 0.0),
+        "bound": outputs.get("bound", outputs["total_price"]),
+    }
+
+
+def _solve_record(args):
+    budget, strategy, stocks, prices, backend = args
+    return optimize(budget, strategy, stocks, prices, backend=backend)
+
+
+def solve_batch(
+    records,
+    currency,
+    plants_prices_extra_rate,
+    dishes_prices_extra_rate,
+    talent_price_bonus,
+    processes=None,
+    backend=None,
+):
+    """
+    Solve many inventories that share the same currency and rate settings.
+
+    Prices are computed once; records missing from `SOLUTION_CACHE` are solved
+    in parallel across `processes` worker processes (all cores by default,
+    serially when 1).
+
+    Args:
+        - records (list): (budget, strategy, inventory) tuples, where inventory
+          is a sequence of counts in catalog order or a {(name, tier): count} mapping.
+        - currency (str): "gold" or "gems".
+        - plants_prices_extra_rate (int): Blooms acquisition rate index.
+        - dishes_prices_extra_rate (int): Confiserie acquisition rate index.
+        - talent_price_bonus (int): Talent price bonus in percent.
+        - processes (int): Number of worker processes.
+        - backend (str): One of `SOLVER_BACKENDS`, defaults to `DEFAULT_BACKEND`.
+
+    Returns:
+        - list[dict]: One dict per record with the budget, strategy, the sold
+          items as {"name", "tier", "price", "count"} entries, the total price,
+          total count and remaining budget.
+    """
+    catalog = current_catalog()
+    prices = get_prices(
+        currency,
+        plants_prices_extra_rate,
+        dishes_prices_extra_rate,
+        talent_price_bonus,
+        catalog=catalog,
+    )
+    tasks = [
+        (budget, strategy, inventory_to_stocks(inventory, catalog), prices, backend)
+        for budget, strategy, inventory in records
+    ]
+
+    keys = [solution_key(*task[:4]) for task in tasks]
+    outputs = [SOLUTION_CACHE.get(key, version=catalog.version) for key in keys]
+    pending = [i for i, output in enumerate(outputs) if output is None]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(pending) <= 1:
+        solved = map(_solve_record, (tasks[i] for i in pending))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            solved = list(
+                executor.map(
+                    _solve_record,
+                    (tasks[i] for i in pending),
+                    chunksize=max(1, len(pending) // (4 * processes)),
+                )
+            )
+    for i, output in zip(pending, solved):
+        outputs[i] = output
+        SOLUTION_CACHE.put(keys[i], output, version=catalog.version)
+
+    return [
+        structure_results(output, prices, budget, strategy, catalog=catalog)
+        for (budget, strategy, _), output in zip(records, outputs)
+    ]
+
+
+def format_batch_results(batch_results, language, currency, catalog=None) -> list[str]:
+    """
+    Formats the output of `solve_batch` for display, as `get_results` does.
+    """
+    from ui.display import format_results
+
+    catalog = catalog or current_catalog()
+    formatted = []
+    for result in batch_results:
+        solution = [0] * catalog.size
+        prices = np.zeros(catalog.size, dtype=np.int64)
+        for item in result["items"]:
+            i = catalog.item_index[(item["name"], item["tier"])]
+            solution[i] = item["count"]
+            prices[i] = item["price"]
+        outputs = dict(result, solution=solution)
+        formatted.append(
+            format_results(
+                label_results(outputs, prices, language, currency, catalog=catalog),
+                language,
+            )
+        )
+    return formatted
@@ -1,20 +1,78 @@
+from functools import lru_cache
 from typing import Sequence
 
 import gradio as gr
 
 from data_loader import (
-    DISHES_DF,
-    DISHES_LABELS,
-    GEMS_DISHES_DF,
-    GEMS_PLANTS_DF,
-    GOLD_DISHES_DF,
-    GOLD_PLANTS_DF,
-    LABELS,
-    PLANTS_DF,
-    PLANTS_LABELS,
-    TIERS_LABELS,
+    MAX_ALTERNATIVES,
+    MAX_BUDGET,
+    MAX_STOCK,
+    MAX_TALENT_BONUS,
+    UI_CATALOG,
+    add_reload_hook,
+    current_catalog,
 )
 
+# The inventory inputs are rendered once, in the item order of the catalog the
+# page was built from; a reloaded catalog only changes their labels, prices
+# and visibility
+ITEM_NAMES = UI_CATALOG.item_names
+ITEM_TIERS = UI_CATALOG.item_tiers
+TIER_CLASSES = [
+    f"tier-{tier.replace('_rarecolor', '-rarecolor')}" for tier in ITEM_TIERS
+]
+
+
+def _build_inventory_indices():
+    """Returns, per (is_plant, name), the inventory input indices of that item."""
+    indices = {}
+    for i, (name, is_plant) in enumerate(zip(ITEM_NAMES, UI_CATALOG.is_plant)):
+        indices.setdefault((bool(is_plant), str(name)), []).append(i)
+    return indices
+
+
+INVENTORY_INDICES = _build_inventory_indices()
+# Inventory input indices of the plants and of the dishes; each selector only
+# updates its own inputs
+PLANT_INPUTS = [i for i, is_plant in enumerate(UI_CATALOG.is_plant) if is_plant]
+DISH_INPUTS = [i for i, is_plant in enumerate(UI_CATALOG.is_plant) if not is_plant]
+
+
+def _page():
+    """Returns the current catalog in the item order of the inventory inputs."""
+    return current_catalog().in_layout(UI_CATALOG)
+
+
+def _labels(language):
+    return _page().labels[language]
+
+
+@lru_cache(maxsize=4)
+def _catalog_index(page):
+    """
+    Catalog index for the UI callbacks, so they never walk the DataFrames:
+    per currency, the plant and dish names sold for it, and per
+    (is_plant, name, currency), the indices shown once that item is selected.
+    """
+    currency_plant_names = {
+        "gold": frozenset(page.item_names[page.gold_plants_mask].tolist()),
+        "gems": frozenset(page.item_names[page.gems_plants_mask].tolist()),
+    }
+    currency_dish_names = {
+        "gold": frozenset(page.item_names[page.gold_dishes_mask].tolist()),
+        "gems": frozenset(page.item_names[page.gems_dishes_mask].tolist()),
+    }
+    visible = {}
+    for i, (name, tier, is_plant) in enumerate(
+        zip(page.item_names, page.item_tiers, page.is_plant)
+    ):
+        key = (bool(is_plant), str(name))
+        for currency, prices in page.base_prices.items():
+            visible.setdefault(key + (currency,), [])
+            if prices[i] > 0 and not (is_plant and tier == "feeble"):
+                visible[key + (currency,)].append(i)
+    return currency_plant_names, currency_dish_names, visible
+
 
 def get_language(language="en"):
     """
@@ -23,28 +81,86 @@ def get_language(language="en"):
     return gr.Radio(
         choices=[("English", "en"), ("简体中文", "cn"), ("日本語", "ja")],
         value="en",
-        label=LABELS[language]["ui"]["language"]["label"],
-        info=LABELS[language]["ui"]["language"]["info"],
+        label=_labels(language)["ui"]["language"]["label"],
+        info=_labels(language)["ui"]["language"]["info"],
         elem_id="language-select",
         interactive=True,
     )
 
 
-def update_inventory_ui_by_language(language):
-    inventory_inputs = [
-        gr.update(
-            label=LABELS[language]["plants"][row["name"]],
-            info=f"{LABELS[language]['tiers'][row['tier']]} ${row['gold'] if row['gold'] > 0 else row['gems']}",
+@lru_cache(maxsize=16)
+def _inventory_labels(page, language) -> tuple[tuple[str, str], ...]:
+    """Returns the (label, info) of every inventory input in the given language."""
+    labels = page.labels[language]
+    return tuple(
+        (
+            labels["plants" if is_plant else "dishes"][name],
+            f"{labels['tiers'][tier]} ${gold if gold > 0 else gems}",
         )
-        for _, row in PLANTS_DF.iterrows()
-    ] + [
-        gr.update(
-            label=LABELS[language]["dishes"][row["name"]],
-            info=f"{LABELS[language]['tiers'][row['tier']]} ${row['gold'] if row['gold'] > 0 else row['gems']}",
+        for name, tier, is_plant, gold, gems in zip(
+            page.item_names,
+            page.item_tiers,
+            page.is_plant,
+            page.base_prices["gold"],
+            page.base_prices["gems"],
         )
-        for _, row in DISHES_DF.iterrows()
-    ]
-    return inventory_inputs
+    )
+
+
+class InventoryView:
+    """
+    What one browser session shows of the inventory inputs: the selected and
+    visible input indices, and the (label, info) last sent to each input.
+
+    The inventory callbacks compare their target state with it and send an
+    update only for the inputs that differ, `gr.skip()` for the others.
+    Hidden inputs keep their labels until they are shown again.
+    """
+
+    def __init__(self, labels):
+        self.selected = frozenset()
+        self.visible = frozenset()
+        self.labels = list(labels)
+
+    def update(self, selected, visible, labels, indices=None) -> list:
+        """
+        Returns one update per inventory input in `indices` (all of them by
+        default) moving it to the given state, and records that state.
+        `selected` and `visible` only hold indices from `indices`.
+        """
+        indices = range(len(labels)) if indices is None else indices
+        updates = []
+        for i in indices:
+            label = labels[i]
+            changes = {}
+            if (i in visible) != (i in self.visible):
+                changes["visible"] = i in visible
+                changes["elem_classes"] = [TIER_CLASSES[i]] if i in visible else []
+            if i in self.selected and i not in selected:
+                changes["value"] = 0
+            if i in visible and label != self.labels[i]:
+                changes["label"], changes["info"] = label
+                self.labels[i] = label
+            updates.append(gr.update(**changes) if changes else gr.skip())
+        self.selected = self.selected.difference(indices).union(selected)
+        self.visible = self.visible.difference(indices).union(visible)
+        return updates
+
+
+def get_inventory_view():
+    """
+    Returns a Gradio State with the `InventoryView` of the prerendered
+    inventory inputs: all hidden, with English labels.
+    """
+    return gr.State(InventoryView(_inventory_labels(_page(), "en")))
+
+
+def update_inventory_ui_by_language(language, view: InventoryView):
+    """
+    Relabels the visible inventory inputs in the selected language.
+    """
+    labels = _inventory_labels(_page(), language)
+    return view.update(view.selected, view.visible, labels) + [view]
 
 
 def get_currency(language="en"):
@@ -53,13 +169,13 @@ def get_currency(language="en"):
     """
     return gr.Radio(
         choices=[
-            (LABELS[language]["ui"]["currency"]["gold"], "gold"),
-            (LABELS[language]["ui"]["currency"]["gems"], "gems"),
+            (_labels(language)["ui"]["currency"]["gold"], "gold"),
+            (_labels(language)["ui"]["currency"]["gems"], "gems"),
         ],
         value="gold",
         type="value",
-        label=LABELS[language]["ui"]["currency"]["label"],
-        info=LABELS[language]["ui"]["currency"]["info"],
+        label=_labels(language)["ui"]["currency"]["label"],
+        info=_labels(language)["ui"]["currency"]["info"],
         interactive=True,
         elem_id="currency-radio",
         render=True,
@@ -72,13 +188,13 @@ def get_budget(language="en"):
     """
     return gr.Number(
         value=0,
-        label=LABELS[language]["ui"]["budget"]["label"],
-        info=LABELS[language]["ui"]["budget"]["info"],
+        label=_labels(language)["ui"]["budget"]["label"],
+        info=_labels(language)["ui"]["budget"]["info"],
         elem_id="budget-number",
         interactive=True,
         precision=0,
         minimum=0,
-        maximum=50000,
+        maximum=MAX_BUDGET,
         step=1000,
     )
 
@@ -90,10 +206,12 @@ def get_blooms_acquisition_rate(language="en"):
     return gr.Dropdown(
         choices=[
             (option, i)
-            for i, option in enumerate(LABELS[language]["ui"]["blooms_rate"]["options"])
+            for i, option in enumerate(
+                _labels(language)["ui"]["blooms_rate"]["options"]
+            )
         ],
-        label=LABELS[language]["ui"]["blooms_rate"]["label"],
-        info=LABELS[language]["ui"]["blooms_rate"]["info"],
+        label=_labels(language)["ui"]["blooms_rate"]["label"],
+        info=_labels(language)["ui"]["blooms_rate"]["info"],
         interactive=True,
     )
 
@@ -103,10 +221,12 @@ def get_confiserie_acquisition_rate(language="en"):
     return gr.Dropdown(
         choices=[
             (option, i)
-            for i, option in enumerate(LABELS[language]["ui"]["blooms_rate"]["options"])
+            for i, option in enumerate(
+                _labels(language)["ui"]["blooms_rate"]["options"]
+            )
         ],
-        label=LABELS[language]["ui"]["confiserie_rate"]["label"],
-        info=LABELS[language]["ui"]["confiserie_rate"]["info"],
+        label=_labels(language)["ui"]["confiserie_rate"]["label"],
+        info=_labels(language)["ui"]["confiserie_rate"]["info"],
         interactive=True,
     )
 
@@ -115,19 +235,21 @@ def match_currency_plant(plant_name: str, currency: str) -> bool:
     """
     Checks if a plant can be purchased with the given currency.
     """
-    if currency == "gold":
-        return plant_name in GOLD_PLANTS_DF["name"].values
-    elif currency == "gems":
-        return plant_name in GEMS_PLANTS_DF["name"].values
-    return False
+    return plant_name in _catalog_index(_page())[0].get(currency, ())
+
+
+@lru_cache(maxsize=32)
+def _plant_choices(page, language, currency) -> tuple[tuple[str, str], ...]:
+    names = _catalog_index(page)[0].get(currency, ())
+    return tuple(
+        (page.labels[language]["plants"][plant], plant)
+        for plant in page.labels["en"]["plants"].keys()
+        if plant in names
+    )
 
 
 def _generate_plant_choices(language, currency):
-    return [
-        (LABELS[language]["plants"][plant], plant)
-        for plant in PLANTS_LABELS.keys()
-        if match_currency_plant(plant, currency)
-    ]
+    return list(_plant_choices(_page(), language, currency))
 
 
 def get_plants_selector(language, currency):
@@ -143,8 +265,8 @@ def get_plants_selector(language, currency):
         choices=filtered_plants_labels,
         value=default_value,
         type="value",
-        label=LABELS[language]["ui"]["plants_selector"]["label"],
-        info=LABELS[language]["ui"]["plants_selector"]["info"],
+        label=_labels(language)["ui"]["plants_selector"]["label"],
+        info=_labels(language)["ui"]["plants_selector"]["info"],
         interactive=True,
     )
     return checkbox_group
@@ -174,19 +296,21 @@ def match_currency_dish(dish_name: str, currency: str) -> bool:
     """
     Checks if a dish can be purchased with the given currency.
     """
-    if currency == "gold":
-        return dish_name in GOLD_DISHES_DF["name"].values
-    elif currency == "gems":
-        return dish_name in GEMS_DISHES_DF["name"].values
-    return False
+    return dish_name in _catalog_index(_page())[1].get(currency, ())
+
+
+@lru_cache(maxsize=32)
+def _dish_choices(page, language, currency) -> tuple[tuple[str, str], ...]:
+    names = _catalog_index(page)[1].get(currency, ())
+    return tuple(
+        (page.labels[language]["dishes"][dish], dish)
+        for dish in page.labels["en"]["dishes"].keys()
+        if dish in names
+    )
 
 
 def _generate_dish_choices(language, currency):
-    return [
-        (LABELS[language]["dishes"][dish], dish)
-        for dish in DISHES_LABELS.keys()
-        if match_currency_dish(dish, currency)
-    ]
+    return list(_dish_choices(_page(), language, currency))
 
 
 def get_dishes_selector(language, currency):
@@ -203,8 +327,8 @@ def get_dishes_selector(language, currency):
         choices=filtered_dishes_labels,
         value=default_value,
         type="value",
-        label=LABELS[language]["ui"]["dishes_selector"]["label"],
-        info=LABELS[language]["ui"]["dishes_selector"]["info"],
+        label=_labels(language)["ui"]["dishes_selector"]["label"],
+        info=_labels(language)["ui"]["dishes_selector"]["info"],
         interactive=True,
     )
 
@@ -250,68 +374,62 @@ def update_dishes_selector_on_language(language, currency):
 
 def prerender_inventory_inputs() -> list[gr.Number]:
     """Returns Gradio Number components for inventory input."""
-    return [
-        _get_inventory_input(row, visible=False) for _, row in PLANTS_DF.iterrows()
-    ] + [_get_inventory_input(row, visible=False) for _, row in DISHES_DF.iterrows()]
+    return [_get_inventory_input(i, visible=False) for i in range(len(ITEM_NAMES))]
 
 
-def _get_inventory_input(row, visible=True, **kwargs) -> gr.Number:
+def _get_inventory_input(i, visible=True, **kwargs) -> gr.Number:
     """
-    Returns a Gradio Number component for inventory input based on the dataframe row data."""
-    # Determine CSS class based on tier
-    tier_class = f"tier-{row['tier'].replace('_rarecolor', '-rarecolor')}"
+    Returns a Gradio Number component for inventory input of the i-th catalog item."""
+    label, info = _inventory_labels(_page(), "en")[i]
 
     return gr.Number(
-        label=PLANTS_LABELS[row["name"]]
-        if row["name"] in PLANTS_LABELS
-        else DISHES_LABELS[row["name"]],
-        info=f"{TIERS_LABELS[row['tier']]} ${row['gold'] if row['gold'] > 0 else row['gems']}",
+        label=label,
+        info=info,
         value=0,
         precision=0,
         minimum=0,
-        maximum=2000,
+        maximum=MAX_STOCK,
         visible=visible,
         interactive=True,
-        key=f"{row['name']}-{row['tier']}",
-        elem_classes=[tier_class] if visible else [],
+        key=f"{ITEM_NAMES[i]}-{ITEM_TIERS[i]}",
+        elem_classes=[TIER_CLASSES[i]] if visible else [],
         **kwargs,
     )
 
 
-def update_inventory_inputs(
-    selected_plants: Sequence[str], selected_dishes: Sequence[str], currency: str
-) -> list[gr.Number]:
+def _update_item_inputs(is_plant, names, currency, language, view):
     """
-    Updates the inventory inputs based on the selected plants and dishes.
+    Shows the inventory inputs of the selected plants (or dishes) sold for
+    the currency and resets the deselected ones to 0.
     """
-    _out = []
-    for _, row in PLANTS_DF.iterrows():
-        if row["name"] in selected_plants:
-            is_visible = row[currency] > 0 and row["tier"] != "feeble"
-            tier_class = f"tier-{row['tier'].replace('_rarecolor', '-rarecolor')}"
-            _out.append(
-                gr.Number(
-                    visible=is_visible,
-                    elem_classes=[tier_class] if is_visible else [],
-                )
-            )
-        else:
-            _out.append(gr.Number(value=0, visible=False))
-
-    for _, row in DISHES_DF.iterrows():
-        if row["name"] in selected_dishes:
-            is_visible = row[currency] > 0
-            tier_class = f"tier-{row['tier'].replace('_rarecolor', '-rarecolor')}"
-            _out.append(
-                gr.Number(
-                    visible=is_visible,
-                    elem_classes=[tier_class] if is_visible else [],
-                )
-            )
-        else:
-            _out.append(gr.Number(value=0, visible=False))
+    visible_indices = _catalog_index(_page())[2]
+    selected = set()
+    visible = set()
+    for name in names or ():
+        selected.update(INVENTORY_INDICES.get((is_plant, name), ()))
+        visible.update(visible_indices.get((is_plant, name, currency), ()))
+
+    labels = _inventory_labels(_page(), language)
+    indices = PLANT_INPUTS if is_plant else DISH_INPUTS
+    return view.update(selected, visible, labels, indices) + [view]
+
+
+def update_plant_inputs(
+    selected_plants: Sequence[str], currency: str, language: str, view: InventoryView
+) -> list:
+    """
+    Updates the plant inventory inputs based on the selected plants.
+    """
+    return _update_item_inputs(True, selected_plants, currency, language, view)
+
 
-    return _out
+def update_dish_inputs(
+    selected_dishes: Sequence[str], currency: str, language: str, view: InventoryView
+) -> list:
+    """
+    Updates the dish inventory inputs based on the selected dishes.
+    """
+    return _update_item_inputs(False, selected_dishes, currency, language, view)
 
 
 def get_talent_price_bonus(language="en"):
@@ -320,13 +438,13 @@ def get_talent_price_bonus(language="en"):
     """
     return gr.Number(
         value=0,
-        label=LABELS[language]["ui"]["talent_price_bonus"],
-        info=LABELS[language]["ui"]["talent_price_bonus_info"],
+        label=_labels(language)["ui"]["talent_price_bonus"],
+        info=_labels(language)["ui"]["talent_price_bonus_info"],
         elem_id="talent-price-bonus",
         interactive=True,
         precision=0,
         minimum=0,
-        maximum=1000,
+        maximum=MAX_TALENT_BONUS,
         step=1,
     )
 
@@ -337,47 +455,320 @@ def get_strategy(language="en"):
     """
     return gr.Radio(
         choices=[
-            (LABELS[language]["ui"]["strategy"]["maximize_stock"], "MaximizeStock"),
-            (LABELS[language]["ui"]["strategy"]["minimize_stock"], "MinimizeStock"),
+            (_labels(language)["ui"]["strategy"]["maximize_stock"], "MaximizeStock"),
+            (_labels(language)["ui"]["strategy"]["minimize_stock"], "MinimizeStock"),
         ],
         value="MinimizeStock",
         type="value",
-        label=LABELS[language]["ui"]["strategy"]["label"],
-        info=LABELS[language]["ui"]["strategy"]["info"],
+        label=_labels(language)["ui"]["strategy"]["label"],
+        info=_labels(language)["ui"]["strategy"]["info"],
         interactive=True,
         elem_id="strategy-radio",
     )
 
 
-def format_results(results, language="en"):
+def format_results(results, language="en", final=True, status=True):
     """
     Format the results for display.
 
     Args:
-        results (dict): The results dictionary containing solution, total_price, total_count, and remaining.
+        results (dict): The results dictionary containing solution, total_price, total_count, remaining and, for time-limited solves, optimal, gap and bound. A "sensitivity" entry adds a section with the value of one unit more or less of each item.
         language (str): The language code for localization.
+        final (bool): False for a preliminary answer shown while the solve is still running.
+        status (bool): Whether to end with the optimal/approximate/preliminary line.
 
     Returns:
         str: A formatted string representation of the results.
     """
     output = []
-    output.append(f"{LABELS[language]['ui']['results']['solution']}: ")
+    output.append(f"{_labels(language)['ui']['results']['solution']}: ")
     for item, count in results["solution"].items():
         output.append(f"{item}: {count}")
 
     output.append(
-        f"\n{LABELS[language]['ui']['results']['total_value']}: {results['total_price']}"
+        f"\n{_labels(language)['ui']['results']['total_value']}: {results['total_price']}"
     )
     output.append(
-        f"{LABELS[language]['ui']['results']['total_count']}: {results['total_count']}"
+        f"{_labels(language)['ui']['results']['total_count']}: {results['total_count']}"
     )
     output.append(
-        f"{LABELS[language]['ui']['results']['remaining_budget']}: {results['remaining']} {'😞' if results['remaining'] else '😁'}"
+        f"{_labels(language)['ui']['results']['remaining_budget']}: {results['remaining']} {'😞' if results['remaining'] else '😁'}"
     )
+    if not status:
+        return "\n".join(output)
+    if not final:
+        output.append(
+            _labels(language)["ui"]["results"]["preliminary"].format(
+                gap=results["gap"], bound=results["bound"]
+            )
+        )
+    elif results.get("optimal", True):
+        output.append(_labels(language)["ui"]["results"]["optimal"])
+    else:
+        output.append(
+            _labels(language)["ui"]["results"]["approximate"].format(
+                gap=results["gap"], bound=results["bound"]
+            )
+        )
+    if results.get("sensitivity"):
+        output.append(format_sensitivity(results["sensitivity"], language))
+
+    return "\n".join(output)
+
 
+def format_sensitivity(report, language="en"):
+    """
+    Format the report of `solver.sensitivity`, keyed by item labels, for
+    display below the results.
+    """
+    labels = _labels(language)["ui"]["sensitivity"]
+    output = [f"\n{labels['title']}:"]
+    for item, (gain, loss) in report["items"].items():
+        output.append(labels["item"].format(item=item, gain=gain, loss=loss))
+    if report["next_value"] is None:
+        output.append(labels["sold_out"])
+    else:
+        output.append(
+            labels["next_value"].format(
+                value=report["next_value"], slack=report["budget_slack"]
+            )
+        )
     return "\n".join(output)
 
 
+def format_alternatives(plans, language="en"):
+    """
+    Format the plans of `solver.k_best_solutions` for display, best first,
+    each as `format_results` does under a numbered heading.
+    """
+    labels = _labels(language)["ui"]
+    sections = []
+    for rank, plan in enumerate(plans, start=1):
+        sections.append(
+            "\n".join(
+                [
+                    labels["alternatives"]["plan"].format(rank=rank),
+                    format_results(plan, language, status=False),
+                    labels["results"]["optimal"]
+                    if plan["optimal"]
+                    else labels["alternatives"]["same_value"]
+                    if plan["gap"] == 0
+                    else labels["alternatives"]["below_best"].format(
+                        gap=plan["gap"], bound=plan["bound"]
+                    ),
+                ]
+            )
+        )
+    return "\n\n".join(sections)
+
+
+def format_day_plan(total, days, language="en"):
+    """
+    Format a plan of `solver.plan_days` for display: each day as
+    `format_results` does under its own heading, then the totals.
+    """
+    labels = _labels(language)["ui"]
+    sections = [
+        "\n".join(
+            [
+                labels["days"]["day"].format(day=day),
+                format_results(results, language, status=False),
+            ]
+        )
+        for day, results in enumerate(days, start=1)
+    ]
+    sections.append(
+        "\n".join(
+            [
+                labels["days"]["total"],
+                format_results(total, language, status=False),
+                labels["results"]["optimal"]
+                if total["optimal"]
+                else labels["days"]["approximate"].format(
+                    gap=total["gap"], bound=total["bound"]
+                ),
+            ]
+        )
+    )
+    return "\n\n".join(sections)
+
+
+def get_frontier_button(language="en"):
+    """
+    Returns a Gradio Button component for plotting value against budget.
+    """
+    return gr.Button(_labels(language)["ui"]["frontier"]["button"])
+
+
+def get_frontier_plot(language="en"):
+    """
+    Returns a Gradio LinePlot component showing the best total value for every budget.
+    """
+    return gr.LinePlot(
+        x="budget",
+        y="total_value",
+        x_title=_labels(language)["ui"]["frontier"]["budget"],
+        y_title=_labels(language)["ui"]["frontier"]["total_value"],
+        label=_labels(language)["ui"]["frontier"]["label"],
+    )
+
+
+def get_alternatives_count(language="en"):
+    """
+    Returns a Gradio Number component for the number of alternative plans.
+    """
+    return gr.Number(
+        value=3,
+        label=_labels(language)["ui"]["alternatives"]["count"],
+        info=_labels(language)["ui"]["alternatives"]["count_info"],
+        interactive=True,
+        precision=0,
+        minimum=1,
+        maximum=MAX_ALTERNATIVES,
+        step=1,
+    )
+
+
+def get_alternatives_distance(language="en"):
+    """
+    Returns a Gradio Number component for the minimum difference between plans.
+    """
+    return gr.Number(
+        value=1,
+        label=_labels(language)["ui"]["alternatives"]["min_distance"],
+        info=_labels(language)["ui"]["alternatives"]["min_distance_info"],
+        interactive=True,
+        precision=0,
+        minimum=1,
+        step=1,
+    )
+
+
+def get_alternatives_distinct(language="en"):
+    """
+    Returns a Gradio Checkbox component requiring a different item set per plan.
+    """
+    return gr.Checkbox(
+        value=False,
+        label=_labels(language)["ui"]["alternatives"]["distinct_items"],
+        interactive=True,
+    )
+
+
+@lru_cache(maxsize=8)
+def _item_choices(page, language) -> tuple[tuple[str, int], ...]:
+    """Returns a (label, inventory input index) choice per item of `page`."""
+    labels = page.labels[language]
+    return tuple(
+        (
+            f"{labels['plants' if is_plant else 'dishes'][name]} ({labels['tiers'][tier]})",
+            i,
+        )
+        for i, (name, tier, is_plant) in enumerate(
+            zip(page.item_names, page.item_tiers, page.is_plant)
+        )
+    )
+
+
+def get_alternatives_keep(language="en"):
+    """
+    Returns a Gradio Dropdown component for the items no alternative plan may sell.
+    """
+    return gr.Dropdown(
+        choices=list(_item_choices(_page(), language)),
+        value=[],
+        multiselect=True,
+        label=_labels(language)["ui"]["alternatives"]["keep_items"],
+        info=_labels(language)["ui"]["alternatives"]["keep_items_info"],
+        interactive=True,
+    )
+
+
+def get_alternatives_sell(language="en"):
+    """
+    Returns a Gradio Dropdown component for the items every alternative plan sells.
+    """
+    return gr.Dropdown(
+        choices=list(_item_choices(_page(), language)),
+        value=[],
+        multiselect=True,
+        label=_labels(language)["ui"]["alternatives"]["sell_items"],
+        info=_labels(language)["ui"]["alternatives"]["sell_items_info"],
+        interactive=True,
+    )
+
+
+def get_alternatives_button(language="en"):
+    """
+    Returns a Gradio Button component for listing alternative plans.
+    """
+    return gr.Button(_labels(language)["ui"]["alternatives"]["button"])
+
+
+def get_alternatives_output(language="en"):
+    """
+    Returns a Gradio Textbox component showing the alternative plans.
+    """
+    return gr.Textbox(
+        label=_labels(language)["ui"]["alternatives"]["label"], show_copy_button=True
+    )
+
+
+def get_sweep_bonuses(language="en"):
+    """
+    Returns a Gradio Textbox component for the talent bonuses of a what-if sweep.
+    """
+    return gr.Textbox(
+        value="0, 25, 50, 75, 100",
+        label=_labels(language)["ui"]["sweep"]["bonuses"],
+        info=_labels(language)["ui"]["sweep"]["bonuses_info"],
+        interactive=True,
+    )
+
+
+def get_sweep_button(language="en"):
+    """
+    Returns a Gradio Button component for comparing rates and talent bonuses.
+    """
+    return gr.Button(_labels(language)["ui"]["sweep"]["button"])
+
+
+def get_sweep_output(language="en"):
+    """
+    Returns a Gradio Dataframe component showing the total value of every
+    rate and talent combination.
+    """
+    return gr.Dataframe(label=_labels(language)["ui"]["sweep"]["label"])
+
+
+def get_days_budgets(language="en"):
+    """
+    Returns a Gradio Textbox component for the budget of each day of a plan.
+    """
+    return gr.Textbox(
+        label=_labels(language)["ui"]["days"]["budgets"],
+        info=_labels(language)["ui"]["days"]["budgets_info"],
+        placeholder="5000, 5000, 8000",
+        interactive=True,
+    )
+
+
+def get_days_button(language="en"):
+    """
+    Returns a Gradio Button component for planning sales over several days.
+    """
+    return gr.Button(_labels(language)["ui"]["days"]["button"])
+
+
+def get_days_output(language="en"):
+    """
+    Returns a Gradio Textbox component showing the multi-day plan.
+    """
+    return gr.Textbox(
+        label=_labels(language)["ui"]["days"]["label"], show_copy_button=True
+    )
+
+
 def update_all_ui_components(language):
     """
     Update all UI components with localized text.
@@ -391,61 +782,136 @@ def update_all_ui_components(language):
     return [
         # Language component
         gr.update(
-            label=LABELS[language]["ui"]["language"]["label"],
-            info=LABELS[language]["ui"]["language"]["info"],
+            label=_labels(language)["ui"]["language"]["label"],
+            info=_labels(language)["ui"]["language"]["info"],
         ),
         # Currency component
         gr.update(
-            label=LABELS[language]["ui"]["currency"]["label"],
-            info=LABELS[language]["ui"]["currency"]["info"],
+            label=_labels(language)["ui"]["currency"]["label"],
+            info=_labels(language)["ui"]["currency"]["info"],
             choices=[
-                (LABELS[language]["ui"]["currency"]["gold"], "gold"),
-                (LABELS[language]["ui"]["currency"]["gems"], "gems"),
+                (_labels(language)["ui"]["currency"]["gold"], "gold"),
+                (_labels(language)["ui"]["currency"]["gems"], "gems"),
             ],
         ),
         # Budget component
         gr.update(
-            label=LABELS[language]["ui"]["budget"]["label"],
-            info=LABELS[language]["ui"]["budget"]["info"],
+            label=_labels(language)["ui"]["budget"]["label"],
+            info=_labels(language)["ui"]["budget"]["info"],
         ),
         # Blooms acquisition rate component
         gr.update(
-            label=LABELS[language]["ui"]["blooms_rate"]["label"],
-            info=LABELS[language]["ui"]["blooms_rate"]["info"],
+            label=_labels(language)["ui"]["blooms_rate"]["label"],
+            info=_labels(language)["ui"]["blooms_rate"]["info"],
             choices=[
                 (option, i)
                 for i, option in enumerate(
-                    LABELS[language]["ui"]["blooms_rate"]["options"]
+                    _labels(language)["ui"]["blooms_rate"]["options"]
                 )
             ],
         ),
         # Confiserie acquisition rate component
         gr.update(
-            label=LABELS[language]["ui"]["confiserie_rate"]["label"],
-            info=LABELS[language]["ui"]["confiserie_rate"]["info"],
+            label=_labels(language)["ui"]["confiserie_rate"]["label"],
+            info=_labels(language)["ui"]["confiserie_rate"]["info"],
             choices=[
                 (option, i)
                 for i, option in enumerate(
-                    LABELS[language]["ui"]["confiserie_rate"]["options"]
+                    _labels(language)["ui"]["confiserie_rate"]["options"]
                 )
             ],
         ),
         # Strategy component
         gr.update(
-            label=LABELS[language]["ui"]["strategy"]["label"],
-            info=LABELS[language]["ui"]["strategy"]["info"],
+            label=_labels(language)["ui"]["strategy"]["label"],
+            info=_labels(language)["ui"]["strategy"]["info"],
             choices=[
-                (LABELS[language]["ui"]["strategy"]["maximize_stock"], "MaximizeStock"),
-                (LABELS[language]["ui"]["strategy"]["minimize_stock"], "MinimizeStock"),
+                (
+                    _labels(language)["ui"]["strategy"]["maximize_stock"],
+                    "MaximizeStock",
+                ),
+                (
+                    _labels(language)["ui"]["strategy"]["minimize_stock"],
+                    "MinimizeStock",
+                ),
             ],
         ),
         # Talent price bonus component
         gr.update(
-            label=LABELS[language]["ui"]["talent_price_bonus"],
-            info=LABELS[language]["ui"]["talent_price_bonus_info"],
+            label=_labels(language)["ui"]["talent_price_bonus"],
+            info=_labels(language)["ui"]["talent_price_bonus_info"],
         ),
         # Results component
-        gr.update(label=LABELS[language]["ui"]["results"]["label"]),
+        gr.update(label=_labels(language)["ui"]["results"]["label"]),
         # Solve button
-        gr.update(value=LABELS[language]["ui"]["solve_button"]),
+        gr.update(value=_labels(language)["ui"]["solve_button"]),
+        # Frontier button
+        gr.update(value=_labels(language)["ui"]["frontier"]["button"]),
+        # Frontier plot
+        gr.update(
+            label=_labels(language)["ui"]["frontier"]["label"],
+            x_title=_labels(language)["ui"]["frontier"]["budget"],
+            y_title=_labels(language)["ui"]["frontier"]["total_value"],
+        ),
+        # Alternative plans count
+        gr.update(
+            label=_labels(language)["ui"]["alternatives"]["count"],
+            info=_labels(language)["ui"]["alternatives"]["count_info"],
+        ),
+        # Alternative plans minimum difference
+        gr.update(
+            label=_labels(language)["ui"]["alternatives"]["min_distance"],
+            info=_labels(language)["ui"]["alternatives"]["min_distance_info"],
+        ),
+        # Alternative plans distinct items
+        gr.update(label=_labels(language)["ui"]["alternatives"]["distinct_items"]),
+        # Alternative plans kept items
+        gr.update(
+            label=_labels(language)["ui"]["alternatives"]["keep_items"],
+            info=_labels(language)["ui"]["alternatives"]["keep_items_info"],
+            choices=list(_item_choices(_page(), language)),
+        ),
+        # Alternative plans sold items
+        gr.update(
+            label=_labels(language)["ui"]["alternatives"]["sell_items"],
+            info=_labels(language)["ui"]["alternatives"]["sell_items_info"],
+            choices=list(_item_choices(_page(), language)),
+        ),
+        # Alternative plans button
+        gr.update(value=_labels(language)["ui"]["alternatives"]["button"]),
+        # Alternative plans output
+        gr.update(label=_labels(language)["ui"]["alternatives"]["label"]),
+        # Multi-day plan budgets
+        gr.update(
+            label=_labels(language)["ui"]["days"]["budgets"],
+            info=_labels(language)["ui"]["days"]["budgets_info"],
+        ),
+        # Multi-day plan button
+        gr.update(value=_labels(language)["ui"]["days"]["button"]),
+        # Multi-day plan output
+        gr.update(label=_labels(language)["ui"]["days"]["label"]),
+        # What-if sweep talent bonuses
+        gr.update(
+            label=_labels(language)["ui"]["sweep"]["bonuses"],
+            info=_labels(language)["ui"]["sweep"]["bonuses_info"],
+        ),
+        # What-if sweep button
+        gr.update(value=_labels(language)["ui"]["sweep"]["button"]),
+        # What-if sweep table
+        gr.update(label=_labels(language)["ui"]["sweep"]["label"]),
     ]
+
+
+def _warm_caches(catalog):
+    """Builds the UI indexes of a reloaded catalog before it is swapped in."""
+    page = catalog.in_layout(UI_CATALOG)
+    _catalog_index(page)
+    for language in page.labels:
+        _inventory_labels(page, language)
+        _item_choices(page, language)
+        for currency in page.base_prices:
+            _plant_choices(page, language, currency)
+            _dish_choices(page, language, currency)
+
+
+add_reload_hook(_warm_caches)
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import gradio as gr
+
+import metrics
+from data_loader import current_catalog
+from scheduler import SCHEDULER
+from solver import estimate_cost, get_results_stream, optimize
+
+# Number of solver processes; 0 solves inside the Gradio worker thread
+SOLVER_WORKERS = int(os.environ.get("ARITHMANCY_SOLVER_WORKERS", os.cpu_count() or 1))
+# Seconds a request may wait for its solve before giving up
+SOLVE_TIMEOUT = float(os.environ.get("ARITHMANCY_SOLVE_TIMEOUT", "30"))
+
+_POOL = None
+
+
+def _init_worker():
+    """Load the catalog once per worker so requests only pay for the solve."""
+    import data_loader  # noqa: F401
+    import solver  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def _optimize_traced(submitted_at, budget, strategy, stocks, sold_prices, report):
+    """Run `optimize` in a worker and send its metrics back with the outputs."""
+    with metrics.capture() as records:
+        metrics.observe("queue_wait", time.time() - submitted_at)
+        outputs = optimize(budget, strategy, stocks, sold_prices, report=report)
+    return outputs, records
+
+
+def start_pool(workers=SOLVER_WORKERS):
+    """
+    Start the solver process pool and wait until every worker has loaded the
+    catalog. Call this before the Gradio server starts its threads, so that
+    workers are forked from a single-threaded process where fork is available.
+    """
+    global _POOL
+    if _POOL is None and workers > 0:
+        context = multiprocessing.get_context(
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        _POOL = ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker
+        )
+        for future in [_POOL.submit(_ping) for _ in range(workers)]:
+            future.result()
+    return _POOL
+
+
+def shutdown_pool():
+    """Stop the solver process pool."""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(cancel_futures=True)
+        _POOL = None
+
+
+def optimize_in_pool(
+    budget, strategy, stocks, sold_prices, timeout=SOLVE_TIMEOUT, report=False
+):
+    """
+    Run `optimize` in the solver process pool, raising `TimeoutError` if it
+    does not finish within `timeout` seconds. Requests wait for a free worker
+    in `SCHEDULER`, so cheap problems overtake expensive ones. With `report`,
+    the worker also computes the `sensitivity` report.
+    """
+    return SCHEDULER.run(
+        estimate_cost(budget, stocks, sold_prices),
+        _optimize_in_pool,
+        budget,
+        strategy,
+        stocks,
+        sold_prices,
+        timeout,
+        report,
+    )
+
+
+def _optimize_in_pool(budget, strategy, stocks, sold_prices, timeout, report):
+    pool = start_pool()
+    if pool is None:
+        return optimize(budget, strategy, stocks, sold_prices, report=report)
+
+    future = pool.submit(
+        _optimize_traced, time.time(), budget, strategy, stocks, sold_prices, report
+    )
+    try:
+        outputs, records = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        # A running solve cannot be interrupted, but a queued one is dropped
+        future.cancel()
+        metrics.increment("solves", status="timeout")
+        raise TimeoutError(f"Solve did not finish within {timeout} seconds")
+    except Exception:
+        # Metrics captured in the worker are lost with its exception
+        metrics.increment("solves", status="failed")
+        raise
+    metrics.replay(records)
+    return outputs
+
+
+def get_results_in_pool(language, *args):
+    """
+    `get_results_stream` with the solve dispatched to the process pool, for
+    use as a Gradio generator callback.
+    """
+    try:
+        yield from get_results_stream(language, *args, optimize_fn=optimize_in_pool)
+    except TimeoutError:
+        raise gr.Error(
+            current_catalog()
+            .labels[language]["ui"]["results"]["timeout"]
+            .format(seconds=int(SOLVE_TIMEOUT))
+        )